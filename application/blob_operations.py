@@ -1,18 +1,20 @@
 from io import StringIO
 from os import environ, remove
 
-from azure.storage.blob import BlobServiceClient, ContainerClient
-
-from utils.logger import App_Logger
+from utils.client_pool import get_pooled_container_client, get_pooled_service_client
+from utils.logger import App_Logger, trace_spans
 from utils.read_params import read_params
 
 
+@trace_spans
 class Blob_Operation:
     def __init__(self):
         self.config = read_params()
 
         self.connection_string = environ["AZURE_CONN_STR"]
 
+        self.pool_config = self.config["blob_client"]
+
         self.class_name = self.__class__.__name__
 
         self.log_writer = App_Logger()
@@ -23,11 +25,11 @@ class Blob_Operation:
         self.log_writer.start_log("start", self.class_name, method_name, log_file)
 
         try:
-            container_client = ContainerClient.from_connection_string(
-                self.connection_string, container
+            container_client = get_pooled_container_client(
+                self.connection_string, container, self.pool_config
             )
 
-            self.log_writer.log("Got container client from connection string", log_file)
+            self.log_writer.log("Got container client from client pool", log_file)
 
             self.log_writer.start_log("exit", self.class_name, method_name, log_file)
 
@@ -40,11 +42,9 @@ class Blob_Operation:
         method_name = self.get_blob_client.__name__
 
         try:
-            client = BlobServiceClient.from_connection_string(self.connection_string)
+            client = get_pooled_service_client(self.connection_string, self.pool_config)
 
-            self.log_writer.log(
-                "Got BlobServiceClient from connection string", log_file
-            )
+            self.log_writer.log("Got BlobServiceClient from client pool", log_file)
 
             blob_client = client.get_blob_client(container=container, blob=blob_fname)
 
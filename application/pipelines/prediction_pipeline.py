@@ -47,21 +47,32 @@ class Pred_Pipeline:
                 "Executed raw pred data validation component", self.pred_pipeline_log
             )
 
-            self.log_writer.log(
-                "Executing pred data transformation component", self.pred_pipeline_log
-            )
-
-            pred_data_trans = self.pred_comp.pred_data_transform().after(
-                raw_pred_data_val
-            )
-
-            pred_data_trans.execution_options.caching_strategy.max_cache_stalenes = (
-                "POD"
-            )
-
-            self.log_writer.log(
-                "Executed pred data transformation component", self.pred_pipeline_log
-            )
+            if self.config["fuse_data_transform"] is True:
+                self.log_writer.log(
+                    "Fused pred data transformation into database operation component",
+                    self.pred_pipeline_log,
+                )
+
+                pred_data_trans = raw_pred_data_val
+
+            else:
+                self.log_writer.log(
+                    "Executing pred data transformation component",
+                    self.pred_pipeline_log,
+                )
+
+                pred_data_trans = self.pred_comp.pred_data_transform().after(
+                    raw_pred_data_val
+                )
+
+                pred_data_trans.execution_options.caching_strategy.max_cache_stalenes = (
+                    "POD"
+                )
+
+                self.log_writer.log(
+                    "Executed pred data transformation component",
+                    self.pred_pipeline_log,
+                )
 
             self.log_writer.log(
                 "Executing pred data operation component", self.pred_pipeline_log
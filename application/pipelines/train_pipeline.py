@@ -48,21 +48,32 @@ class Train_Pipeline:
                 "Executed raw train data validation component", self.train_pipeline_log
             )
 
-            self.log_writer.log(
-                "Executing train data transformation component", self.train_pipeline_log
-            )
-
-            train_data_trans = self.train_comp.train_data_trans_component().after(
-                raw_train_data_val
-            )
-
-            train_data_trans.execution_options.caching_strategy.max_cache_stalenes = (
-                "POD"
-            )
-
-            self.log_writer.log(
-                "Executed train data transformation component", self.train_pipeline_log
-            )
+            if self.config["fuse_data_transform"] is True:
+                self.log_writer.log(
+                    "Fused train data transformation into database operation component",
+                    self.train_pipeline_log,
+                )
+
+                train_data_trans = raw_train_data_val
+
+            else:
+                self.log_writer.log(
+                    "Executing train data transformation component",
+                    self.train_pipeline_log,
+                )
+
+                train_data_trans = self.train_comp.train_data_trans_component().after(
+                    raw_train_data_val
+                )
+
+                train_data_trans.execution_options.caching_strategy.max_cache_stalenes = (
+                    "POD"
+                )
+
+                self.log_writer.log(
+                    "Executed train data transformation component",
+                    self.train_pipeline_log,
+                )
 
             self.log_writer.log(
                 "Executing train data operation component", self.train_pipeline_log
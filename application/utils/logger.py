@@ -1,9 +1,203 @@
 from datetime import datetime
+from functools import wraps
+from inspect import isgeneratorfunction
+from json import dumps
 from os import makedirs
 from os.path import join
+from threading import Lock, local
+from time import perf_counter, time
 
 from utils.read_params import read_params
 
+_span_lock = Lock()
+
+_span_stats = {}
+
+_span_stack = local()
+
+
+def get_span_size(value):
+    """
+    Method Name :   get_span_size
+    Description :   This method gets the bytes and the number of items of a value passed to or returned from a traced
+                    method, values without a known size are returned as None
+
+    Output      :   A tuple of bytes and number of items is returned
+    On Failure  :   Write an exception log and then raise an exception
+
+    Version     :   1.2
+    Revisions   :   moved setup to cloud
+    """
+    if isinstance(value, (bytes, bytearray, str)):
+        return len(value), None
+
+    if hasattr(value, "memory_usage") and hasattr(value, "__len__"):
+        usage = value.memory_usage(index=False)
+
+        return int(usage.sum() if hasattr(usage, "sum") else usage), len(value)
+
+    if hasattr(value, "nbytes") and hasattr(value, "__len__"):
+        return int(value.nbytes), len(value)
+
+    if isinstance(getattr(value, "size", None), int):
+        return value.size, None
+
+    if hasattr(value, "getvalue"):
+        return len(value.getvalue()), None
+
+    if isinstance(value, (list, tuple, dict, set)):
+        return None, len(value)
+
+    return None, None
+
+
+def record_span(span):
+    """
+    Method Name :   record_span
+    Description :   This method adds the span to the process wide span statistics used for the summary table
+
+    Output      :   The span statistics are updated with the span
+    On Failure  :   Write an exception log and then raise an exception
+
+    Version     :   1.2
+    Revisions   :   moved setup to cloud
+    """
+    with _span_lock:
+        stats = _span_stats.setdefault(span["span"], [0, 0, 0.0, 0.0, 0, 0])
+
+        stats[0] += 1
+
+        stats[1] += span["status"] == "error"
+
+        stats[2] += span["duration"]
+
+        stats[3] = max(stats[3], span["duration"])
+
+        stats[4] += span["bytes"] or 0
+
+        stats[5] += span["items"] or 0
+
+
+def trace_span(func):
+    """
+    Method Name :   trace_span
+    Description :   This method wraps a method of a class with a log_writer, every call of the method is written as a
+                    json span to the spans log file with start, end, duration, bytes, number of items, status and the
+                    span it was called from
+
+    Output      :   The wrapped method is returned
+    On Failure  :   Write an exception log and then raise an exception
+
+    Version     :   1.2
+    Revisions   :   moved setup to cloud
+    """
+
+    @wraps(func)
+    def wrapper(self, *args, **kwargs):
+        stack = _span_stack.__dict__.setdefault("names", [])
+
+        span_name = f"{self.__class__.__name__}.{func.__name__}"
+
+        parent = stack[-1] if stack else None
+
+        stack.append(span_name)
+
+        start_time, start = time(), perf_counter()
+
+        status, result = "ok", None
+
+        try:
+            result = func(self, *args, **kwargs)
+
+            return result
+
+        except Exception:
+            status = "error"
+
+            raise
+
+        finally:
+            duration = perf_counter() - start
+
+            stack.pop()
+
+            nbytes, items = get_span_size(result)
+
+            for arg in args:
+                if nbytes is not None or items is not None:
+                    break
+
+                if not isinstance(arg, str):
+                    nbytes, items = get_span_size(arg)
+
+            span = {
+                "span": span_name,
+                "parent": parent,
+                "start": start_time,
+                "end": start_time + duration,
+                "duration": duration,
+                "bytes": nbytes,
+                "items": items,
+                "status": status,
+            }
+
+            record_span(span)
+
+            self.log_writer.span_log(span)
+
+    return wrapper
+
+
+def trace_spans(cls):
+    """
+    Method Name :   trace_spans
+    Description :   This method wraps every public method of the class with trace_span, generator methods are left as
+                    they are since their work happens after the call returns
+
+    Output      :   The class with traced methods is returned
+    On Failure  :   Write an exception log and then raise an exception
+
+    Version     :   1.2
+    Revisions   :   moved setup to cloud
+    """
+    for name, attr in list(vars(cls).items()):
+        if (
+            callable(attr)
+            and not name.startswith("_")
+            and not isgeneratorfunction(attr)
+        ):
+            setattr(cls, name, trace_span(attr))
+
+    return cls
+
+
+def print_span_summary():
+    """
+    Method Name :   print_span_summary
+    Description :   This method prints the summary table of the spans recorded in the process, sorted by total time
+
+    Output      :   The summary table of the spans is printed
+    On Failure  :   Write an exception log and then raise an exception
+
+    Version     :   1.2
+    Revisions   :   moved setup to cloud
+    """
+    header = f"{'span':<50}{'calls':>8}{'errors':>8}{'total s':>10}{'mean ms':>10}{'max ms':>10}{'MB':>10}{'items':>10}"
+
+    print(header)
+
+    print("-" * len(header))
+
+    with _span_lock:
+        rows = sorted(_span_stats.items(), key=lambda kv: kv[1][2], reverse=True)
+
+    for span_name, (calls, errors, total, longest, nbytes, items) in rows:
+        print(
+            f"{span_name:<50}{calls:>8}{errors:>8}{total:>10.3f}{total / calls * 1000:>10.1f}"
+            f"{longest * 1000:>10.1f}{nbytes / 1e6:>10.2f}{items:>10}"
+        )
+
+
 
 class App_Logger:
     def __init__(self):
@@ -25,6 +219,25 @@ class App_Logger:
         except Exception as e:
             raise e
 
+    def span_log(self, span):
+        """
+        Method Name :   span_log
+        Description :   This method writes the span as a json line to the spans log file
+
+        Output      :   The span is written to the spans log file
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        try:
+            log_fpath = join(self.log_dir, self.config["log"]["spans"])
+
+            self.write_info_to_file(dumps(span, default=str) + "\n", log_fpath)
+
+        except Exception as e:
+            raise e
+
     def log(self, log_info, log_file):
         try:
             self.now = datetime.now()
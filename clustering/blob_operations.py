@@ -1,16 +1,18 @@
-from io import StringIO
+from io import BytesIO, StringIO
+from json import dumps
 from os import environ, listdir, remove
 from os.path import join
 from pickle import dump
 from shutil import rmtree
 
-from azure.storage.blob import BlobServiceClient, ContainerClient
-from pandas import read_csv
+from pandas import Series, read_csv, read_parquet
 
-from utils.logger import App_Logger
+from utils.client_pool import get_pooled_container_client, get_pooled_service_client
+from utils.logger import App_Logger, trace_spans
 from utils.read_params import read_params
 
 
+@trace_spans
 class Blob_Operation:
     """
     Description :   This class is used for performing blob operations required by the service
@@ -24,6 +26,12 @@ class Blob_Operation:
 
         self.connection_string = environ["AZURE_CONN_STR"]
 
+        self.pool_config = self.config["blob_client"]
+
+        self.upload_config = self.config["blob_upload"]
+
+        self.frame_config = self.config["frame_store"]
+
         self.class_name = self.__class__.__name__
 
         self.container = self.config["blob_container"]
@@ -52,12 +60,11 @@ class Blob_Operation:
         self.log_writer.start_log("start", self.class_name, method_name, log_file)
 
         try:
-            container_client = ContainerClient.from_connection_string(
-                conn_str=self.connection_string,
-                container_name=self.container[container],
+            container_client = get_pooled_container_client(
+                self.connection_string, self.container[container], self.pool_config
             )
 
-            self.log_writer.log("Got container client from connection string", log_file)
+            self.log_writer.log("Got container client from client pool", log_file)
 
             self.log_writer.start_log("exit", self.class_name, method_name, log_file)
 
@@ -83,11 +90,9 @@ class Blob_Operation:
         self.log_writer.start_log("start", self.class_name, method_name, log_file)
 
         try:
-            client = BlobServiceClient.from_connection_string(self.connection_string)
+            client = get_pooled_service_client(self.connection_string, self.pool_config)
 
-            self.log_writer.log(
-                "Got blob service client from connection string", log_file
-            )
+            self.log_writer.log("Got blob service client from client pool", log_file)
 
             blob_client = client.get_blob_client(
                 container=self.container[container], blob=self.files[blob_fname]
@@ -393,14 +398,89 @@ class Blob_Operation:
         except Exception as e:
             self.log_writer.exception_log(e, self.class_name, method_name, log_file)
 
+    def get_frame_fname(self, fname, log_file):
+        """
+        Method Name :   get_frame_fname
+        Description :   This method gets the blob name of the dataframe file based on the format set for the feature store
+
+        Output      :   The blob name with the extension of the feature store format is returned
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.get_frame_fname.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, log_file)
+
+        try:
+            frame_fname = fname
+
+            if self.frame_config["format"] == "parquet":
+                frame_fname = fname.replace(".csv", ".parquet")
+
+            self.log_writer.log(
+                f"Got {frame_fname} as file name for {self.frame_config['format']} format",
+                log_file,
+            )
+
+            self.log_writer.start_log("exit", self.class_name, method_name, log_file)
+
+            return frame_fname
+
+        except Exception as e:
+            self.log_writer.exception_log(e, self.class_name, method_name, log_file)
+
+    def read_frame(self, fname, container, log_file, columns=None):
+        """
+        Method Name :   read_frame
+        Description :   This method reads the dataframe file from container in the format set for the feature store,
+                        with columns as the list of columns to be read. Parquet files keep the column types
+
+        Output      :   The dataframe file is read from the container and returned as dataframe
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.read_frame.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, log_file)
+
+        try:
+            frame_fname = self.get_frame_fname(self.files[fname], log_file)
+
+            client = self.get_container_client(container, log_file)
+
+            content = BytesIO(client.download_blob(blob=frame_fname).readall())
+
+            if self.frame_config["format"] == "parquet":
+                df = read_parquet(content, columns=columns)
+
+            else:
+                df = read_csv(content, usecols=columns)
+
+            self.log_writer.log(
+                f"Read {frame_fname} file from {container} container", log_file
+            )
+
+            self.log_writer.start_log("exit", self.class_name, method_name, log_file)
+
+            return df
+
+        except Exception as e:
+            self.log_writer.exception_log(e, self.class_name, method_name, log_file)
+
     def upload_df_as_csv(
         self, dataframe, local_fname, container_fname, container, log_file
     ):
         """
         Method Name :   upload_df_as_csv
-        Description :   This method uploads the dataframe as csv file to blob container
+        Description :   This method uploads the dataframe as csv file to blob container. The dataframe is serialized in memory,
+                        and large dataframes are streamed in chunks of rows, so no local copy is written. The local_fname
+                        parameter is kept for the existing callers and is not used
         
-        Output      :   The dataframe is uploaded to blob container as a csv file
+        Output      :   The dataframe is uploaded to blob container as a csv file, replacing the existing file
         On Failure  :   Write an exception log and then raise an exception
         
         Version     :   1.2
@@ -411,13 +491,106 @@ class Blob_Operation:
         self.log_writer.start_log("start", self.class_name, method_name, log_file)
 
         try:
-            dataframe.to_csv(local_fname, index=None, header=True)
+            client = self.get_container_client(container, log_file)
+
+            chunk_rows = self.upload_config["chunk_rows"]
+
+            if len(dataframe) > chunk_rows:
+                data = (
+                    dataframe.iloc[i : i + chunk_rows]
+                    .to_csv(index=None, header=i == 0)
+                    .encode()
+                    for i in range(0, len(dataframe), chunk_rows)
+                )
+
+            else:
+                data = dataframe.to_csv(index=None, header=True).encode()
+
+            client.upload_blob(name=container_fname, data=data, overwrite=True)
+
+            self.log_writer.log(
+                f"Uploaded dataframe to {container} container with name as {container_fname} file",
+                log_file,
+            )
+
+            self.log_writer.start_log("exit", self.class_name, method_name, log_file)
+
+        except Exception as e:
+            self.log_writer.exception_log(e, self.class_name, method_name, log_file)
+
+    def write_frame(self, dataframe, fname, container, log_file):
+        """
+        Method Name :   write_frame
+        Description :   This method uploads the dataframe to blob container in the format set for the feature store.
+                        Parquet files are compressed with the codec set for the feature store
+
+        Output      :   The dataframe is uploaded to blob container, replacing the existing file
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.write_frame.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, log_file)
+
+        try:
+            if isinstance(dataframe, Series):
+                dataframe = dataframe.to_frame()
+
+            if self.frame_config["format"] == "parquet":
+                frame_fname = self.get_frame_fname(fname, log_file)
+
+                client = self.get_container_client(container, log_file)
+
+                buffer = BytesIO()
+
+                dataframe.to_parquet(
+                    buffer, index=False, compression=self.frame_config["compression"]
+                )
+
+                client.upload_blob(
+                    name=frame_fname, data=buffer.getvalue(), overwrite=True
+                )
+
+            else:
+                self.upload_df_as_csv(dataframe, fname, fname, container, log_file)
 
             self.log_writer.log(
-                f"Created a local copy of dataframe with name {local_fname}", log_file
+                f"Uploaded dataframe to {container} container as {fname} in {self.frame_config['format']} format",
+                log_file,
             )
 
-            self.upload_file(local_fname, container_fname, container, log_file)
+            self.log_writer.start_log("exit", self.class_name, method_name, log_file)
+
+        except Exception as e:
+            self.log_writer.exception_log(e, self.class_name, method_name, log_file)
+
+    def write_json(self, obj, fname, container, log_file):
+        """
+        Method Name :   write_json
+        Description :   This method uploads the object as a json file to blob container
+
+        Output      :   The object is uploaded to blob container as json, replacing the existing file
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.write_json.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, log_file)
+
+        try:
+            client = self.get_container_client(container, log_file)
+
+            client.upload_blob(
+                name=self.files[fname], data=dumps(obj, indent=2), overwrite=True
+            )
+
+            self.log_writer.log(
+                f"Uploaded {fname} json to {container} container", log_file
+            )
 
             self.log_writer.start_log("exit", self.class_name, method_name, log_file)
 
@@ -453,7 +626,7 @@ class Blob_Operation:
 
                 dest_f = folder + "/" + f
 
-                self.upload_file(local_f, dest_f, container, log_file)
+                self.upload_file(local_f, dest_f, container, log_file, delete=delete)
 
             if delete is True:
                 rmtree(folder)
@@ -1,12 +1,39 @@
-from kneed import KneeLocator
-from sklearn.cluster import KMeans
+from joblib import Parallel, delayed
+from sklearn.cluster import KMeans, MiniBatchKMeans
 
 from blob_operations import Blob_Operation
+from k_selectors import K_SELECTORS, is_wcss_flat
 from utils.logger import App_Logger
 from utils.main_utils import Main_Utils
 from utils.read_params import read_params
 
 
+def fit_kmeans(data, n_clusters, kmeans_params, minibatch_params=None):
+    """
+    Method Name :   fit_kmeans
+    Description :   This method fits kmeans with n_clusters clusters on the data, it is a module level function so that
+                    it can be sent to the workers of the elbow sweep. MiniBatchKMeans is fitted when minibatch_params
+                    are given
+
+    Output      :   The fitted kmeans is returned
+    On Failure  :   Write an exception log and then raise an exception
+
+    Version     :   1.2
+    Revisions   :   moved setup to cloud
+    """
+    if minibatch_params is None:
+        kmeans = KMeans(n_clusters=n_clusters, **kmeans_params)
+
+    else:
+        kmeans = MiniBatchKMeans(
+            n_clusters=n_clusters, **kmeans_params, **minibatch_params
+        )
+
+    kmeans.fit(data)
+
+    return kmeans
+
+
 class KMeans_Clustering:
     """
     Description :   This class shall be used to divide the data into clusters before training.
@@ -26,6 +53,14 @@ class KMeans_Clustering:
 
         self.max_clusters = self.config["max_clusters"]
 
+        self.sweep_params = self.config["elbow_sweep"]
+
+        self.random_state = self.config["base"]["random_state"]
+
+        self.sweep_models = {}
+
+        self.selection_params = self.config["k_selection"]
+
         self.blob = Blob_Operation()
 
         self.utils = Main_Utils()
@@ -34,6 +69,178 @@ class KMeans_Clustering:
 
         self.class_name = self.__class__.__name__
 
+    def get_sweep_data(self, data):
+        """
+        Method Name :   get_sweep_data
+        Description :   This method gets the data the elbow sweep is fitted on, in subsample mode a random sample of
+                        sample_size rows is used so the sweep time does not grow with the size of the training data
+
+        Output      :   The data for the elbow sweep is returned
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   Moved to setup to cloud
+        """
+        method_name = self.get_sweep_data.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, self.log_file)
+
+        try:
+            sample_size = self.sweep_params["sample_size"]
+
+            if self.sweep_params["mode"] == "subsample" and len(data) > sample_size:
+                data = data.sample(n=sample_size, random_state=self.random_state)
+
+            self.log_writer.log(
+                f"Got {len(data)} rows for elbow sweep in {self.sweep_params['mode']} mode",
+                self.log_file,
+            )
+
+            self.log_writer.start_log(
+                "exit", self.class_name, method_name, self.log_file
+            )
+
+            return data
+
+        except Exception as e:
+            self.log_writer.exception_log(
+                e, self.class_name, method_name, self.log_file
+            )
+
+    def get_wcss(self, data):
+        """
+        Method Name :   get_wcss
+        Description :   This method fits kmeans for every candidate number of clusters concurrently with n_jobs joblib
+                        workers, so the sweep takes about as long as the slowest single fit. In minibatch mode
+                        MiniBatchKMeans is fitted and in subsample mode the fits use a sample of the data, the full
+                        fit is done only for the chosen number of clusters in create_clusters. The fitted models
+                        are kept by number of clusters so that create_clusters can reuse them. With early stop
+                        the candidates are fitted in batches of batch_size and the sweep stops once the wcss curve
+                        has flattened
+
+        Output      :   The within cluster sum of squares for 1 to at most max_clusters - 1 clusters is returned
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   Moved to setup to cloud
+        """
+        method_name = self.get_wcss.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, self.log_file)
+
+        try:
+            kmeans_params = dict(self.kmeans_params)
+
+            minibatch_params = (
+                dict(self.sweep_params["minibatch"])
+                if self.sweep_params["mode"] == "minibatch"
+                else None
+            )
+
+            sweep_data = self.get_sweep_data(data)
+
+            early_stop = self.selection_params["early_stop"]
+
+            ks = list(range(1, self.max_clusters))
+
+            batch_size = (
+                early_stop["batch_size"] if early_stop["enabled"] is True else len(ks)
+            )
+
+            models = []
+
+            with Parallel(
+                n_jobs=self.sweep_params["n_jobs"], backend=self.sweep_params["backend"]
+            ) as parallel:
+                for i in range(0, len(ks), batch_size):
+                    models += parallel(
+                        delayed(fit_kmeans)(
+                            sweep_data, k, kmeans_params, minibatch_params
+                        )
+                        for k in ks[i : i + batch_size]
+                    )
+
+                    if early_stop["enabled"] is True and is_wcss_flat(
+                        [model.inertia_ for model in models],
+                        early_stop["tol"],
+                        early_stop["patience"],
+                    ):
+                        self.log_writer.log(
+                            f"Stopped elbow sweep at {len(models)} clusters as wcss has flattened",
+                            self.log_file,
+                        )
+
+                        break
+
+            self.sweep_models = {model.n_clusters: model for model in models}
+
+            wcss = [model.inertia_ for model in models]
+
+            self.log_writer.log(
+                f"Fitted kmeans for {len(wcss)} cluster counts with {self.sweep_params['n_jobs']} jobs",
+                self.log_file,
+            )
+
+            self.log_writer.start_log(
+                "exit", self.class_name, method_name, self.log_file
+            )
+
+            return wcss
+
+        except Exception as e:
+            self.log_writer.exception_log(
+                e, self.class_name, method_name, self.log_file
+            )
+
+    def select_num_clusters(self, wcss, data):
+        """
+        Method Name :   select_num_clusters
+        Description :   This method selects the optimum number of clusters from the elbow sweep with the selector set
+                        in k_selection, which is one of knee, silhouette, calinski_harabasz and gap
+
+        Output      :   The optimum number of clusters is returned
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   Moved to setup to cloud
+        """
+        method_name = self.select_num_clusters.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, self.log_file)
+
+        try:
+            selector = self.selection_params["selector"]
+
+            params = {
+                **self.selection_params,
+                "knee": self.knee_params,
+                "random_state": self.random_state,
+            }
+
+            num_clusters = K_SELECTORS[selector](
+                list(range(1, len(wcss) + 1)),
+                wcss,
+                self.sweep_models,
+                self.get_sweep_data(data),
+                params,
+            )
+
+            self.log_writer.log(
+                f"Selected {num_clusters} clusters with {selector} selector",
+                self.log_file,
+            )
+
+            self.log_writer.start_log(
+                "exit", self.class_name, method_name, self.log_file
+            )
+
+            return num_clusters
+
+        except Exception as e:
+            self.log_writer.exception_log(
+                e, self.class_name, method_name, self.log_file
+            )
+
     def draw_elbow_plot(self, data):
         """
         Method Name :   draw_elbow_plot
@@ -50,30 +257,22 @@ class KMeans_Clustering:
         self.log_writer.start_log("start", self.class_name, method_name, self.log_file)
 
         try:
-            wcss = []
-
-            for i in range(1, self.max_clusters):
-                kmeans = KMeans(n_clusters=i, **self.kmeans_params)
+            wcss = self.get_wcss(data)
 
-                kmeans.fit(data)
-
-                wcss.append(kmeans.inertia_)
-
-            self.utils.save_and_upload_elbow_plot(
-                self.max_clusters, wcss, self.log_file
-            )
+            self.utils.save_and_upload_elbow_plot(len(wcss) + 1, wcss, self.log_file)
 
-            self.kn = KneeLocator(range(1, self.max_clusters), wcss, **self.knee_params)
+            self.num_clusters = self.select_num_clusters(wcss, data)
 
             self.log_writer.log(
-                f"The optimum number of clusters is {str(self.kn.knee)}", self.log_file
+                f"The optimum number of clusters is {str(self.num_clusters)}",
+                self.log_file,
             )
 
             self.log_writer.start_log(
                 "exit", self.class_name, method_name, self.log_file
             )
 
-            return self.kn.knee
+            return self.num_clusters
 
         except Exception as e:
             self.log_writer.exception_log(
@@ -83,7 +282,9 @@ class KMeans_Clustering:
     def create_clusters(self, data, num_clusters):
         """
         Method Name :   create_clusters
-        Description :   Create a new dataframe consisting of the cluster information.
+        Description :   Create a new dataframe consisting of the cluster information. The model fitted by the
+                        elbow sweep for num_clusters is reused when it was fitted with KMeans on the same data,
+                        otherwise KMeans is fitted on the data starting from the centroids of the sweep model
         
         Output      :   A dataframe with cluster column
         On Failure  :   Write an exception log and then raise an exception
@@ -96,16 +297,41 @@ class KMeans_Clustering:
         self.log_writer.start_log("start", self.class_name, method_name, self.log_file)
 
         try:
-            self.kmeans = KMeans(num_clusters, **self.kmeans_params)
+            model = self.sweep_models.get(num_clusters)
+
+            if (
+                model is not None
+                and self.sweep_params["mode"] == "full"
+                and len(model.labels_) == len(data)
+            ):
+                self.kmeans, self.y_kmeans = model, model.labels_
+
+                self.log_writer.log(
+                    f"Reused the elbow sweep model with {num_clusters} clusters",
+                    self.log_file,
+                )
+
+            else:
+                kmeans_params = dict(self.kmeans_params)
+
+                if model is not None:
+                    kmeans_params.update(init=model.cluster_centers_, n_init=1)
+
+                self.kmeans = KMeans(num_clusters, **kmeans_params)
+
+                self.y_kmeans = self.kmeans.fit_predict(data)
 
-            self.y_kmeans = self.kmeans.fit_predict(data)
+                self.log_writer.log(
+                    f"Fitted kmeans with {num_clusters} clusters on the full data",
+                    self.log_file,
+                )
 
             self.blob.save_model(self.kmeans, "trained", "model", self.log_file)
 
             data["Cluster"] = self.y_kmeans
 
             self.log_writer.log(
-                f"Successfully created {str(self.kn.knee)} clusters", self.log_file
+                f"Successfully created {str(num_clusters)} clusters", self.log_file
             )
 
             self.log_writer.start_log(
@@ -0,0 +1,148 @@
+from kneed import KneeLocator
+from numpy import argmax, log, mean, random, sqrt, std
+from sklearn.cluster import KMeans
+from sklearn.metrics import calinski_harabasz_score, silhouette_score
+
+
+def select_knee(ks, wcss, models, data, params):
+    """
+    Method Name :   select_knee
+    Description :   This method selects the number of clusters at the knee of the wcss curve, when no knee is found
+                    as on a short curve of an early stopped sweep the largest fitted number of clusters is selected
+
+    Output      :   The number of clusters at the knee of the wcss curve is returned
+    On Failure  :   Write an exception log and then raise an exception
+
+    Version     :   1.2
+    Revisions   :   moved setup to cloud
+    """
+    knee = KneeLocator(ks, wcss, **params["knee"]).knee
+
+    return ks[-1] if knee is None else knee
+
+
+def select_silhouette(ks, wcss, models, data, params):
+    """
+    Method Name :   select_silhouette
+    Description :   This method selects the number of clusters with the highest silhouette score, the score is
+                    computed on a sample of sample_size rows as it is quadratic in the number of rows
+
+    Output      :   The number of clusters with the highest silhouette score is returned
+    On Failure  :   Write an exception log and then raise an exception
+
+    Version     :   1.2
+    Revisions   :   moved setup to cloud
+    """
+    sample_size = min(params["silhouette"]["sample_size"], len(data))
+
+    candidates = [k for k in ks if k > 1]
+
+    scores = [
+        silhouette_score(
+            data,
+            models[k].predict(data),
+            sample_size=sample_size,
+            random_state=params["random_state"],
+        )
+        for k in candidates
+    ]
+
+    return candidates[int(argmax(scores))]
+
+
+def select_calinski_harabasz(ks, wcss, models, data, params):
+    """
+    Method Name :   select_calinski_harabasz
+    Description :   This method selects the number of clusters with the highest calinski harabasz score
+
+    Output      :   The number of clusters with the highest calinski harabasz score is returned
+    On Failure  :   Write an exception log and then raise an exception
+
+    Version     :   1.2
+    Revisions   :   moved setup to cloud
+    """
+    candidates = [k for k in ks if k > 1]
+
+    scores = [
+        calinski_harabasz_score(data, models[k].predict(data)) for k in candidates
+    ]
+
+    return candidates[int(argmax(scores))]
+
+
+def select_gap(ks, wcss, models, data, params):
+    """
+    Method Name :   select_gap
+    Description :   This method selects the number of clusters with the gap statistic, the wcss of the data is
+                    compared with the wcss of n_refs uniform reference datasets drawn in the bounding box of a sample
+                    of the data, and the smallest k whose gap is within one standard error of the next gap is selected
+
+    Output      :   The number of clusters selected by the gap statistic is returned
+    On Failure  :   Write an exception log and then raise an exception
+
+    Version     :   1.2
+    Revisions   :   moved setup to cloud
+    """
+    gap_params = params["gap"]
+
+    rng = random.RandomState(params["random_state"])
+
+    sample = data.sample(
+        n=min(gap_params["sample_size"], len(data)), random_state=params["random_state"]
+    )
+
+    low, high = sample.min(axis=0).to_numpy(), sample.max(axis=0).to_numpy()
+
+    refs = [
+        rng.uniform(low, high, size=sample.shape) for _ in range(gap_params["n_refs"])
+    ]
+
+    gaps, errs = [], []
+
+    for k in ks:
+        ref_wcss = log(
+            [
+                KMeans(k, n_init=1, random_state=params["random_state"])
+                .fit(ref)
+                .inertia_
+                for ref in refs
+            ]
+        )
+
+        gaps.append(mean(ref_wcss) - log(-models[k].score(sample)))
+
+        errs.append(std(ref_wcss) * sqrt(1 + 1 / len(refs)))
+
+    for i in range(len(ks) - 1):
+        if gaps[i] >= gaps[i + 1] - errs[i + 1]:
+            return ks[i]
+
+    return ks[int(argmax(gaps))]
+
+
+K_SELECTORS = {
+    "knee": select_knee,
+    "silhouette": select_silhouette,
+    "calinski_harabasz": select_calinski_harabasz,
+    "gap": select_gap,
+}
+
+
+def is_wcss_flat(wcss, tol, patience):
+    """
+    Method Name :   is_wcss_flat
+    Description :   This method checks if the wcss curve has flattened, that is the last patience drops of the wcss
+                    are each smaller than tol times the wcss of a single cluster
+
+    Output      :   True if the wcss curve has flattened, else False
+    On Failure  :   Write an exception log and then raise an exception
+
+    Version     :   1.2
+    Revisions   :   moved setup to cloud
+    """
+    if len(wcss) <= patience or wcss[0] <= 0:
+        return False
+
+    drops = [(wcss[i - 1] - wcss[i]) / wcss[0] for i in range(1, len(wcss))]
+
+    return all(drop < tol for drop in drops[-patience:])
@@ -1,5 +1,5 @@
 from clustering import KMeans_Clustering
-from utils.logger import App_Logger
+from utils.logger import App_Logger, print_span_summary
 from utils.main_utils import Main_Utils
 
 
@@ -56,27 +56,12 @@ class Run:
 
             X["Labels"] = Y
 
-            list_of_clusters = X["Cluster"].unique()
+            manifest = self.utils.write_cluster_partitions(X, "clustering")
 
             self.log_writer.log(
-                f"Got the {list_of_clusters} unique clusters", "clustering"
+                f"Got the {manifest['num_clusters']} unique clusters", "clustering"
             )
 
-            for i in list_of_clusters:
-                cluster_data = X[X["Cluster"] == i]
-
-                cluster_features = cluster_data.drop(["Labels", "Cluster"], axis=1)
-
-                cluster_label = cluster_data["Labels"]
-
-                self.utils.upload_cluster_data(
-                    i, cluster_features, "clustering", key="features"
-                )
-
-                self.utils.upload_cluster_data(
-                    i, cluster_label, "clustering", key="targets"
-                )
-
             self.log_writer.start_log(
                 "exit", self.class_name, method_name, "clustering"
             )
@@ -95,6 +80,10 @@ if __name__ == "__main__":
         raise e
 
     finally:
-        utils = Main_Utils()
+        try:
+            utils = Main_Utils()
+
+            utils.upload_logs()
 
-        utils.upload_logs()
+        finally:
+            print_span_summary()
@@ -1,3 +1,5 @@
+from concurrent.futures import ThreadPoolExecutor
+
 from blob_operations import Blob_Operation
 from matplotlib.pyplot import plot, savefig, title, xlabel, ylabel
 
@@ -24,6 +26,8 @@ class Main_Utils:
 
         self.files = self.config["files"]
 
+        self.upload_workers = self.config["cluster_upload"]["max_workers"]
+
         self.class_name = self.__class__.__name__
 
     def upload_logs(self):
@@ -42,7 +46,14 @@ class Main_Utils:
         self.log_writer.start_log("start", self.class_name, method_name, "upload")
 
         try:
-            self.blob.upload_folder(self.log_dir, "logs", "upload")
+            self.log_writer.flush()
+
+            shipping_failed = self.log_writer.shipping_failed()
+
+            if self.log_writer.ship_logs is False or shipping_failed is True:
+                self.blob.upload_folder(
+                    self.log_dir, "logs", "upload", delete=shipping_failed is False
+                )
 
             self.log_writer.log("Uploaded logs to logs container", "upload")
 
@@ -96,7 +107,7 @@ class Main_Utils:
         self.log_writer.start_log("start", self.class_name, method_name, log_file)
 
         try:
-            data = self.blob.read_csv(key, "feature_store", log_file)
+            data = self.blob.read_frame(key, "feature_store", log_file)
 
             self.log_writer.log(
                 f"Got the training data based on {key} from feature store container",
@@ -133,8 +144,8 @@ class Main_Utils:
                 log_file,
             )
 
-            self.blob.upload_df_as_csv(
-                cluster_data, cluster_fname, cluster_fname, "feature_store", log_file
+            self.blob.write_frame(
+                cluster_data, cluster_fname, "feature_store", log_file
             )
 
             self.log_writer.log(
@@ -146,6 +157,80 @@ class Main_Utils:
         except Exception as e:
             self.log_writer.exception_log(e, self.class_name, method_name, log_file)
 
+    def write_cluster_partitions(self, data, log_file):
+        """
+        Method Name :   write_cluster_partitions
+        Description :   This method splits the clustered data by cluster in a single groupby pass and uploads the
+                        features and targets of all the clusters concurrently. A cluster manifest with the number of
+                        clusters, the rows and the file names of each cluster is uploaded after all the files, so
+                        that downstream stages can read it instead of listing the feature store
+
+        Output      :   The cluster files and the cluster manifest are uploaded to feature store container
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.write_cluster_partitions.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, log_file)
+
+        try:
+            clusters, futures = [], []
+
+            with ThreadPoolExecutor(max_workers=self.upload_workers) as executor:
+                for idx, cluster_data in data.groupby("Cluster", sort=True):
+                    idx = int(idx)
+
+                    features = cluster_data.drop(["Labels", "Cluster"], axis=1)
+
+                    for key, frame in (
+                        ("features", features),
+                        ("targets", cluster_data["Labels"]),
+                    ):
+                        futures.append(
+                            executor.submit(
+                                self.upload_cluster_data, idx, frame, log_file, key=key
+                            )
+                        )
+
+                    clusters.append(
+                        {
+                            "cluster": idx,
+                            "rows": len(cluster_data),
+                            **{
+                                key: self.blob.get_frame_fname(
+                                    self.get_cluster_fname(
+                                        self.files[key], idx, log_file
+                                    ),
+                                    log_file,
+                                )
+                                for key in ("features", "targets")
+                            },
+                        }
+                    )
+
+                for future in futures:
+                    future.result()
+
+            manifest = {"num_clusters": len(clusters), "clusters": clusters}
+
+            self.blob.write_json(
+                manifest, "cluster_manifest", "feature_store", log_file
+            )
+
+            self.log_writer.summary(
+                f"Uploaded {len(clusters)} clusters and the cluster manifest to feature store container",
+                log_file,
+            )
+
+            self.log_writer.start_log("exit", self.class_name, method_name, log_file)
+
+            return manifest
+
+        except Exception as e:
+            self.log_writer.exception_log(e, self.class_name, method_name, log_file)
+
     def save_and_upload_elbow_plot(self, max_clusters, wcss, log_file):
         method_name = self.save_and_upload_elbow_plot.__name__
 
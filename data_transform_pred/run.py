@@ -1,5 +1,5 @@
 from data_transformation_pred import Data_Transform_Pred
-from utils.logger import App_Logger
+from utils.logger import App_Logger, print_span_summary
 from utils.main_utils import Main_Utils
 
 
@@ -36,7 +36,7 @@ class Run:
 
             self.data_transform.add_quotes_to_string()
 
-            self.log_writer.log(
+            self.log_writer.summary(
                 "Data Transformation completed !!", "data_transform_main"
             )
 
@@ -60,6 +60,10 @@ if __name__ == "__main__":
         raise e
 
     finally:
-        utils = Main_Utils()
+        try:
+            utils = Main_Utils()
+
+            utils.upload_logs()
 
-        utils.upload_logs()
+        finally:
+            print_span_summary()
@@ -0,0 +1,87 @@
+from threading import Lock
+
+from azure.core.pipeline.transport import RequestsTransport
+from azure.storage.blob import BlobServiceClient
+from requests import Session
+from requests.adapters import HTTPAdapter
+
+_pool_lock = Lock()
+
+_service_clients = {}
+
+_container_clients = {}
+
+
+def get_pooled_service_client(conn_str, pool_config):
+    """
+    Method Name :   get_pooled_service_client
+    Description :   This method gets the process wide blob service client for the connection string, the client is
+                    created once with a shared http transport and connection pool and is reused by every caller
+
+    Output      :   The pooled blob service client for the connection string is returned
+    On Failure  :   Write an exception log and then raise an exception
+
+    Version     :   1.2
+    Revisions   :   moved setup to cloud
+    """
+    method_name = get_pooled_service_client.__name__
+
+    try:
+        with _pool_lock:
+            if conn_str not in _service_clients:
+                session = Session()
+
+                adapter = HTTPAdapter(
+                    pool_connections=pool_config["pool_connections"],
+                    pool_maxsize=pool_config["pool_maxsize"],
+                )
+
+                session.mount("https://", adapter)
+
+                session.mount("http://", adapter)
+
+                transport = RequestsTransport(session=session, session_owner=False)
+
+                _service_clients[conn_str] = BlobServiceClient.from_connection_string(
+                    conn_str=conn_str, transport=transport
+                )
+
+            return _service_clients[conn_str]
+
+    except Exception as e:
+        raise Exception(
+            f"Exception occured in {__file__}, Method : {method_name}, Error : {str(e)}"
+        )
+
+
+def get_pooled_container_client(conn_str, container_name, pool_config):
+    """
+    Method Name :   get_pooled_container_client
+    Description :   This method gets the process wide container client for the connection string and container name,
+                    the container client shares the transport of the pooled blob service client
+
+    Output      :   The pooled container client for the connection string and container name is returned
+    On Failure  :   Write an exception log and then raise an exception
+
+    Version     :   1.2
+    Revisions   :   moved setup to cloud
+    """
+    method_name = get_pooled_container_client.__name__
+
+    try:
+        key = (conn_str, container_name)
+
+        if key not in _container_clients:
+            client = get_pooled_service_client(conn_str, pool_config)
+
+            with _pool_lock:
+                _container_clients.setdefault(
+                    key, client.get_container_client(container_name)
+                )
+
+        return _container_clients[key]
+
+    except Exception as e:
+        raise Exception(
+            f"Exception occured in {__file__}, Method : {method_name}, Error : {str(e)}"
+        )
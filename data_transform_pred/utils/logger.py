@@ -1,10 +1,332 @@
+from atexit import register
 from datetime import datetime
-from logging import DEBUG, ERROR, basicConfig, error, info
+from functools import wraps
+from inspect import isgeneratorfunction
+from json import dumps
+from logging import (
+    DEBUG,
+    ERROR,
+    INFO,
+    FileHandler,
+    Formatter,
+    Handler,
+    addLevelName,
+    getLevelName,
+    getLogger,
+)
+from logging.handlers import QueueHandler, QueueListener
 from os import makedirs
-from os.path import join
+from os.path import dirname, join
+from queue import Queue
+from threading import Lock, local
+from time import monotonic, perf_counter, time
 
+from utils.log_shipper import Log_Shipper
 from utils.read_params import read_params
 
+SUMMARY = 25
+
+addLevelName(SUMMARY, "SUMMARY")
+
+_log_queue = Queue(-1)
+
+_log_lock = Lock()
+
+_log_listener = None
+
+_span_lock = Lock()
+
+_span_stats = {}
+
+_span_stack = local()
+
+_trace_lock = Lock()
+
+_trace_counts = {}
+
+
+class File_Router(Handler):
+    """
+    Description :   This class is used for writing the queued log records to the log file of each record, a file
+                    handler is opened once for every log file and is reused for all the records of that file
+
+    Version     :   1.2
+    Revisions   :   Moved to setup to cloud
+    """
+
+    def __init__(self):
+        super().__init__(level=DEBUG)
+
+        self.handlers = {}
+
+        self.formatter = Formatter(
+            fmt="%(asctime)s %(levelname)s %(message)s", datefmt="%H:%M:%S"
+        )
+
+        self.raw_formatter = Formatter(fmt="%(message)s")
+
+    def emit(self, record):
+        handler = self.handlers.get(record.log_fpath)
+
+        if handler is None:
+            makedirs(dirname(record.log_fpath), exist_ok=True)
+
+            handler = FileHandler(record.log_fpath, mode="a", delay=True)
+
+            handler.setFormatter(
+                self.raw_formatter
+                if getattr(record, "raw_format", False)
+                else self.formatter
+            )
+
+            self.handlers[record.log_fpath] = handler
+
+        handler.handle(record)
+
+    def flush(self):
+        self.acquire()
+
+        try:
+            for handler in self.handlers.values():
+                handler.close()
+
+            self.handlers.clear()
+
+        finally:
+            self.release()
+
+
+def get_log_listener():
+    """
+    Method Name :   get_log_listener
+    Description :   This method gets the process wide queue listener, the listener is started once and writes the
+                    queued log records to their log files on a background thread. When log shipping is enabled the
+                    records are also appended to the logs container during the run, and the shipper is flushed at
+                    exit after the queue is drained
+
+    Output      :   The started queue listener is returned
+    On Failure  :   Write an exception log and then raise an exception
+
+    Version     :   1.2
+    Revisions   :   moved setup to cloud
+    """
+    global _log_listener
+
+    with _log_lock:
+        if _log_listener is None:
+            config = read_params()
+
+            log_level = config["log_level"]
+
+            logger = getLogger(__name__)
+
+            logger.setLevel(
+                getLevelName(log_level["profiles"][log_level["profile"]]["level"])
+            )
+
+            logger.propagate = False
+
+            logger.addHandler(QueueHandler(_log_queue))
+
+            handlers = [File_Router()]
+
+            if config["log_shipping"]["enabled"] is True:
+                shipper = Log_Shipper()
+
+                handlers.append(shipper)
+
+                register(shipper.close)
+
+            _log_listener = QueueListener(_log_queue, *handlers)
+
+            _log_listener.start()
+
+            register(_log_listener.stop)
+
+        return _log_listener
+
+
+def get_span_size(value):
+    """
+    Method Name :   get_span_size
+    Description :   This method gets the bytes and the number of items of a value passed to or returned from a traced
+                    method, values without a known size are returned as None
+
+    Output      :   A tuple of bytes and number of items is returned
+    On Failure  :   Write an exception log and then raise an exception
+
+    Version     :   1.2
+    Revisions   :   moved setup to cloud
+    """
+    if isinstance(value, (bytes, bytearray, str)):
+        return len(value), None
+
+    if hasattr(value, "memory_usage") and hasattr(value, "__len__"):
+        usage = value.memory_usage(index=False)
+
+        return int(usage.sum() if hasattr(usage, "sum") else usage), len(value)
+
+    if hasattr(value, "nbytes") and hasattr(value, "__len__"):
+        return int(value.nbytes), len(value)
+
+    if isinstance(getattr(value, "size", None), int):
+        return value.size, None
+
+    if hasattr(value, "getvalue"):
+        return len(value.getvalue()), None
+
+    if isinstance(value, (list, tuple, dict, set)):
+        return None, len(value)
+
+    return None, None
+
+
+def record_span(span):
+    """
+    Method Name :   record_span
+    Description :   This method adds the span to the process wide span statistics used for the summary table
+
+    Output      :   The span statistics are updated with the span
+    On Failure  :   Write an exception log and then raise an exception
+
+    Version     :   1.2
+    Revisions   :   moved setup to cloud
+    """
+    with _span_lock:
+        stats = _span_stats.setdefault(span["span"], [0, 0, 0.0, 0.0, 0, 0])
+
+        stats[0] += 1
+
+        stats[1] += span["status"] == "error"
+
+        stats[2] += span["duration"]
+
+        stats[3] = max(stats[3], span["duration"])
+
+        stats[4] += span["bytes"] or 0
+
+        stats[5] += span["items"] or 0
+
+
+def trace_span(func):
+    """
+    Method Name :   trace_span
+    Description :   This method wraps a method of a class with a log_writer, every call of the method is written as a
+                    json span to the spans log file with start, end, duration, bytes, number of items, status and the
+                    span it was called from
+
+    Output      :   The wrapped method is returned
+    On Failure  :   Write an exception log and then raise an exception
+
+    Version     :   1.2
+    Revisions   :   moved setup to cloud
+    """
+
+    @wraps(func)
+    def wrapper(self, *args, **kwargs):
+        stack = _span_stack.__dict__.setdefault("names", [])
+
+        span_name = f"{self.__class__.__name__}.{func.__name__}"
+
+        parent = stack[-1] if stack else None
+
+        stack.append(span_name)
+
+        start_time, start = time(), perf_counter()
+
+        status, result = "ok", None
+
+        try:
+            result = func(self, *args, **kwargs)
+
+            return result
+
+        except Exception:
+            status = "error"
+
+            raise
+
+        finally:
+            duration = perf_counter() - start
+
+            stack.pop()
+
+            nbytes, items = get_span_size(result)
+
+            for arg in args:
+                if nbytes is not None or items is not None:
+                    break
+
+                if not isinstance(arg, str):
+                    nbytes, items = get_span_size(arg)
+
+            span = {
+                "span": span_name,
+                "parent": parent,
+                "start": start_time,
+                "end": start_time + duration,
+                "duration": duration,
+                "bytes": nbytes,
+                "items": items,
+                "status": status,
+            }
+
+            record_span(span)
+
+            self.log_writer.span_log(span)
+
+    return wrapper
+
+
+def trace_spans(cls):
+    """
+    Method Name :   trace_spans
+    Description :   This method wraps every public method of the class with trace_span, generator methods are left as
+                    they are since their work happens after the call returns
+
+    Output      :   The class with traced methods is returned
+    On Failure  :   Write an exception log and then raise an exception
+
+    Version     :   1.2
+    Revisions   :   moved setup to cloud
+    """
+    for name, attr in list(vars(cls).items()):
+        if (
+            callable(attr)
+            and not name.startswith("_")
+            and not isgeneratorfunction(attr)
+        ):
+            setattr(cls, name, trace_span(attr))
+
+    return cls
+
+
+def print_span_summary():
+    """
+    Method Name :   print_span_summary
+    Description :   This method prints the summary table of the spans recorded in the process, sorted by total time
+
+    Output      :   The summary table of the spans is printed
+    On Failure  :   Write an exception log and then raise an exception
+
+    Version     :   1.2
+    Revisions   :   moved setup to cloud
+    """
+    header = f"{'span':<50}{'calls':>8}{'errors':>8}{'total s':>10}{'mean ms':>10}{'max ms':>10}{'MB':>10}{'items':>10}"
+
+    print(header)
+
+    print("-" * len(header))
+
+    with _span_lock:
+        rows = sorted(_span_stats.items(), key=lambda kv: kv[1][2], reverse=True)
+
+    for span_name, (calls, errors, total, longest, nbytes, items) in rows:
+        print(
+            f"{span_name:<50}{calls:>8}{errors:>8}{total:>10.3f}{total / calls * 1000:>10.1f}"
+            f"{longest * 1000:>10.1f}{nbytes / 1e6:>10.2f}{items:>10}"
+        )
+
 
 class App_Logger:
     def __init__(self):
@@ -12,45 +334,169 @@ class App_Logger:
 
         self.log_dir = self.config["dir"]["log"]
 
+        self.log_file = self.config["log"]
+
         self.current_date = f"{datetime.now().strftime('%Y-%m-%d')}"
 
-        self.log_file = self.config["log"]
+        self.ship_logs = self.config["log_shipping"]["enabled"]
+
+        log_level = self.config["log_level"]
+
+        self.log_profile = log_level["profiles"][log_level["profile"]]
+
+        self.listener = get_log_listener()
+
+        self.logger = getLogger(__name__)
 
         makedirs(self.log_dir, exist_ok=True)
 
-    def log(self, log_message, log_file):
+    def get_log_fpath(self, log_file):
+        log_f = self.current_date + "-" + self.log_file.get(log_file, log_file)
+
+        return join(self.log_dir, log_f)
+
+    def log(self, log_message, log_file, level=INFO):
         """
         Method Name :   log
-        Description :   This method writes the log info using current date and time
-        
+        Description :   This method writes the log info using current date and time, the message is queued and
+                        written to the log file on the background thread
+
         Output      :   The logging information is written to file with current date and time
         On Failure  :   Write an exception log and then raise an exception
-        
+
         Version     :   1.2
         Revisions   :   moved setup to cloud
         """
         try:
-            log_f = self.current_date + "-" + self.log_file[log_file]
+            self.logger.log(
+                level, log_message, extra={"log_fpath": self.get_log_fpath(log_file)}
+            )
+
+        except Exception as e:
+            raise e
+
+    def summary(self, log_message, log_file):
+        """
+        Method Name :   summary
+        Description :   This method writes the log info at summary level, summaries are kept by the production profile
+                        which drops the method entry and exit logs and the per file info logs
+
+        Output      :   The summary information is written to file with current date and time
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        self.log(log_message, log_file, level=SUMMARY)
+
+    def should_trace(self, key, class_name, method_name):
+        """
+        Method Name :   should_trace
+        Description :   This method checks whether the entry or exit log of a method is to be written, based on the
+                        sampling and the rate limit of the log profile. Every trace_sample_every call of the method is
+                        written, with at most trace_max_per_second in a second, and 0 as no limit
+
+        Output      :   True if the entry or exit log is to be written, else False
+        On Failure  :   Write an exception log and then raise an exception
 
-            log_file = join(self.log_dir, log_f)
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        every = self.log_profile["trace_sample_every"]
+
+        max_per_second = self.log_profile["trace_max_per_second"]
+
+        if every == 0 or not self.logger.isEnabledFor(DEBUG):
+            return False
+
+        if every == 1 and max_per_second == 0:
+            return True
 
-            basicConfig(
-                filename=log_file,
-                filemode="a",
-                format="%(asctime)s %(levelname)s %(message)s",
-                datefmt="%H:%M:%S",
-                level=DEBUG,
+        trace_key, now = (key, class_name, method_name), int(monotonic())
+
+        with _trace_lock:
+            count, second, in_second = _trace_counts.get(trace_key, (0, now, 0))
+
+            if second != now:
+                second, in_second = now, 0
+
+            keep = count % every == 0 and (
+                max_per_second == 0 or in_second < max_per_second
             )
 
-            info(log_message)
+            _trace_counts[trace_key] = (count + 1, second, in_second + keep)
+
+        return keep
+
+    def span_log(self, span):
+        """
+        Method Name :   span_log
+        Description :   This method writes the span as a json line to the spans log file
+
+        Output      :   The span is written to the spans log file
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        try:
+            self.logger.debug(
+                dumps(span, default=str),
+                extra={"log_fpath": self.get_log_fpath("spans"), "raw_format": True},
+            )
 
         except Exception as e:
             raise e
 
+    def flush(self):
+        """
+        Method Name :   flush
+        Description :   This method waits till all the queued log messages are written, ships them when log
+                        shipping is enabled and closes the log files, so that the log folder can be uploaded or removed
+
+        Output      :   The queued log messages are written to the log files
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        _log_queue.join()
+
+        for handler in self.listener.handlers:
+            handler.flush()
+
+    def shipping_failed(self):
+        """
+        Method Name :   shipping_failed
+        Description :   This method checks whether the log shipper still holds log records after a flush, that is the
+                        records could not be shipped to the logs container. The shipping is then stopped so that the
+                        log folder is uploaded in place of the shipped logs
+
+        Output      :   True if the log records failed to ship, else False
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        for handler in self.listener.handlers:
+            if isinstance(handler, Log_Shipper) and handler.has_pending():
+                handler.discard()
+
+                self.log(
+                    "Failed to ship the logs, uploading the log folder in place of the shipped logs",
+                    "upload",
+                    level=ERROR,
+                )
+
+                return True
+
+        return False
+
     def start_log(self, key, class_name, method_name, log_file):
         """
         Method Name :   start_log
-        Description :   This method creates an entry point log in log file
+        Description :   This method creates an entry point log in log file, at debug level and subject to the
+                        sampling of the log profile
 
         Output      :   An entry point log is created in log file
         On Failure  :   Write an exception log and then raise an exception
@@ -62,11 +508,14 @@ class App_Logger:
         start_method_name = self.start_log.__name__
 
         try:
+            if not self.should_trace(key, class_name, method_name):
+                return
+
             func = lambda: "Entered" if key == "start" else "Exited"
 
             log_msg = f"{func()} {method_name} method of class {class_name}"
 
-            self.log(log_msg, log_file)
+            self.log(log_msg, log_file, level=DEBUG)
 
         except Exception as e:
             error_msg = f"Exception occured in Class : {class_name}, Method : {start_method_name}, Error : {str(e)}"
@@ -86,18 +535,6 @@ class App_Logger:
         """
         exception_msg = f"Exception occured in Class : {class_name}, Method : {method_name}, Error : {str(exception)}"
 
-        log_f = self.current_date + "-" + log_file
-
-        log_file = join(self.log_dir, log_f)
-
-        basicConfig(
-            filename=log_file,
-            filemode="a",
-            format="%(asctime)s %(levelname)s %(message)s",
-            datefmt="%H:%M:%S",
-            level=ERROR,
-        )
-
-        error(exception_msg)
+        self.log(exception_msg, log_file, level=ERROR)
 
         raise Exception(exception_msg)
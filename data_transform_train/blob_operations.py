@@ -1,15 +1,18 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from io import StringIO
 from os import environ, listdir, remove
 from os.path import join
 from shutil import rmtree
 
-from azure.storage.blob import BlobServiceClient, ContainerClient
 from pandas import read_csv
 
-from utils.logger import App_Logger
+from utils.client_pool import get_pooled_container_client, get_pooled_service_client
+from utils.logger import App_Logger, trace_spans
 from utils.read_params import read_params
 
 
+@trace_spans
 class Blob_Operation:
     """
     Description :   This class is used for performing blob operations required by the service
@@ -31,6 +34,14 @@ class Blob_Operation:
 
         self.connection_string = environ["AZURE_CONN_STR"]
 
+        self.pool_config = self.config["blob_client"]
+
+        self.upload_config = self.config["blob_upload"]
+
+        self.download_workers = self.config["blob_download"]["max_workers"]
+
+        self.prefetch = self.config["blob_download"]["prefetch"]
+
     def get_container_client(self, container, log_file):
         """
         Method Name :   get_container_client
@@ -47,12 +58,11 @@ class Blob_Operation:
         self.log_writer.start_log("start", self.class_name, method_name, log_file)
 
         try:
-            container_client = ContainerClient.from_connection_string(
-                conn_str=self.connection_string,
-                container_name=self.container[container],
+            container_client = get_pooled_container_client(
+                self.connection_string, self.container[container], self.pool_config
             )
 
-            self.log_writer.log("Got container client from connection string", log_file)
+            self.log_writer.log("Got container client from client pool", log_file)
 
             self.log_writer.start_log("exit", self.class_name, method_name, log_file)
 
@@ -77,13 +87,9 @@ class Blob_Operation:
         self.log_writer.start_log("start", self.class_name, method_name, log_file)
 
         try:
-            client = BlobServiceClient.from_connection_string(
-                conn_str=self.connection_string
-            )
+            client = get_pooled_service_client(self.connection_string, self.pool_config)
 
-            self.log_writer.log(
-                "Got BlobServiceClient from connection string", log_file
-            )
+            self.log_writer.log("Got BlobServiceClient from client pool", log_file)
 
             blob_client = client.get_blob_client(
                 container=self.container[container], blob=blob_fname
@@ -377,7 +383,8 @@ class Blob_Operation:
         Description :   This method reads the csv files from particular folder in container
         
         Output      :   A list of tuple of dataframe,path of file with file name, and exact file name are returned from the particular 
-                        folder in container
+                        folder in container. The files are downloaded concurrently by a bounded thread pool and the order of
+                        the files is kept
         On Failure  :   Write an exception log and then raise an exception
         
         Version     :   1.2
@@ -390,11 +397,19 @@ class Blob_Operation:
         try:
             files = self.get_files_from_folder(folder_name, container, log_file)
 
-            lst = [
-                (self.read_csv(f, container, log_file), f, f.split("/")[-1],)
-                for f in files
-                if f.endswith(".csv")
-            ]
+            csv_files = [f for f in files if f.endswith(".csv")]
+
+            with ThreadPoolExecutor(max_workers=self.download_workers) as executor:
+                dfs = executor.map(
+                    lambda f: self.read_csv(f, container, log_file), csv_files
+                )
+
+                lst = [(df, f, f.split("/")[-1]) for df, f in zip(dfs, csv_files)]
+
+            self.log_writer.log(
+                f"Downloaded {len(lst)} csv files with {self.download_workers} workers",
+                log_file,
+            )
 
             self.log_writer.log(
                 f"Read csv files from {folder_name} folder from {container} container",
@@ -408,14 +423,65 @@ class Blob_Operation:
         except Exception as e:
             self.log_writer.exception_log(e, self.class_name, method_name, log_file)
 
+    def iter_csv_from_folder(self, folder_name, container, log_file):
+        """
+        Method Name :   iter_csv_from_folder
+        Description :   This method lazily reads the csv files from particular folder in container, only the next few files
+                        as set by the prefetch parameter are downloaded in the background while the current file is processed
+
+        Output      :   A generator of tuple of dataframe,path of file with file name, and exact file name is returned
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.iter_csv_from_folder.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, log_file)
+
+        try:
+            files = self.get_files_from_folder(folder_name, container, log_file)
+
+            csv_files = [f for f in files if f.endswith(".csv")]
+
+            with ThreadPoolExecutor(max_workers=self.download_workers) as executor:
+                pending = deque()
+
+                for f in csv_files:
+                    pending.append(
+                        (executor.submit(self.read_csv, f, container, log_file), f)
+                    )
+
+                    if len(pending) > self.prefetch:
+                        future, fname = pending.popleft()
+
+                        yield future.result(), fname, fname.split("/")[-1]
+
+                while pending:
+                    future, fname = pending.popleft()
+
+                    yield future.result(), fname, fname.split("/")[-1]
+
+            self.log_writer.log(
+                f"Streamed csv files from {folder_name} folder from {container} container",
+                log_file,
+            )
+
+            self.log_writer.start_log("exit", self.class_name, method_name, log_file)
+
+        except Exception as e:
+            self.log_writer.exception_log(e, self.class_name, method_name, log_file)
+
     def upload_df_as_csv(
         self, dataframe, local_fname, container_fname, container, log_file
     ):
         """
         Method Name :   upload_df_as_csv
-        Description :   This method uploads the dataframe as csv file to blob container
+        Description :   This method uploads the dataframe as csv file to blob container. The dataframe is serialized in memory,
+                        and large dataframes are streamed in chunks of rows, so no local copy is written. The local_fname
+                        parameter is kept for the existing callers and is not used
         
-        Output      :   The dataframe is uploaded to blob container as a csv file
+        Output      :   The dataframe is uploaded to blob container as a csv file, replacing the existing file
         On Failure  :   Write an exception log and then raise an exception
         
         Version     :   1.2
@@ -426,14 +492,28 @@ class Blob_Operation:
         self.log_writer.start_log("start", self.class_name, method_name, log_file)
 
         try:
-            dataframe.to_csv(local_fname, index=None, header=True)
+            client = self.get_container_client(container, log_file)
+
+            chunk_rows = self.upload_config["chunk_rows"]
+
+            if len(dataframe) > chunk_rows:
+                data = (
+                    dataframe.iloc[i : i + chunk_rows]
+                    .to_csv(index=None, header=i == 0)
+                    .encode()
+                    for i in range(0, len(dataframe), chunk_rows)
+                )
+
+            else:
+                data = dataframe.to_csv(index=None, header=True).encode()
+
+            client.upload_blob(name=container_fname, data=data, overwrite=True)
 
             self.log_writer.log(
-                f"Created a local copy of dataframe with name {local_fname}", log_file
+                f"Uploaded dataframe to {container} container with name as {container_fname} file",
+                log_file,
             )
 
-            self.upload_file(local_fname, container_fname, container, log_file)
-
             self.log_writer.start_log("exit", self.class_name, method_name, log_file)
 
         except Exception as e:
@@ -468,7 +548,7 @@ class Blob_Operation:
 
                 dest_f = folder + "/" + f
 
-                self.upload_file(local_f, dest_f, container, log_file)
+                self.upload_file(local_f, dest_f, container, log_file, delete=delete)
 
             if delete is True:
                 rmtree(folder)
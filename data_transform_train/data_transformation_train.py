@@ -1,5 +1,6 @@
 from blob_operations import Blob_Operation
 from utils.logger import App_Logger
+from utils.main_utils import Main_Utils
 
 
 class Data_Transform_Train:
@@ -13,6 +14,8 @@ class Data_Transform_Train:
     def __init__(self):
         self.blob = Blob_Operation()
 
+        self.utils = Main_Utils()
+
         self.log_writer = App_Logger()
 
         self.class_name = self.__class__.__name__
@@ -35,7 +38,7 @@ class Data_Transform_Train:
         )
 
         try:
-            lst = self.blob.read_csv_from_folder(
+            lst = self.blob.iter_csv_from_folder(
                 "train_good_data", "train_data", "data_transform"
             )
 
@@ -51,7 +54,7 @@ class Data_Transform_Train:
                     "data_transform",
                 )
 
-                df["DATE"] = df["DATE"].apply(lambda x: "'" + str(x) + "'")
+                df = self.utils.quote_string_columns(df, "data_transform")
 
                 self.log_writer.log(
                     f"Quotes added for the file {file}", "data_transform"
@@ -1,15 +1,77 @@
-from io import StringIO
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO, RawIOBase, StringIO
 from os import environ, listdir, remove
 from os.path import join
 from shutil import rmtree
 
-from azure.storage.blob import BlobServiceClient, ContainerClient
-from pandas import read_csv
+from azure.storage.blob import BlobBlock
+from pandas import DataFrame, Series, read_csv, to_numeric
+from pandas.api.types import is_numeric_dtype
+from pyarrow import Table, float64, string
+from pyarrow import schema as arrow_schema
+from pyarrow.parquet import ParquetWriter
 
-from utils.logger import App_Logger
+from utils.client_pool import get_pooled_container_client, get_pooled_service_client
+from utils.logger import App_Logger, trace_spans
 from utils.read_params import read_params
 
 
+class Block_Sink(RawIOBase):
+    """
+    Description :   This class is used as a writable file which stages everything written to it as blocks of the blob,
+                    a block is staged once block_bytes are buffered and the blob is committed when the sink is closed
+
+    Version     :   1.2
+    Revisions   :   Moved to setup to cloud
+    """
+
+    def __init__(self, blob_client, block_bytes):
+        self.blob_client = blob_client
+
+        self.block_bytes = block_bytes
+
+        self.buffer = bytearray()
+
+        self.block_ids = []
+
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def tell(self):
+        return self.position
+
+    def write(self, data):
+        self.buffer += data
+
+        self.position += len(data)
+
+        if len(self.buffer) >= self.block_bytes:
+            self.stage_block()
+
+        return len(data)
+
+    def stage_block(self):
+        if self.buffer:
+            block_id = f"{len(self.block_ids):08d}"
+
+            self.blob_client.stage_block(block_id=block_id, data=bytes(self.buffer))
+
+            self.block_ids.append(block_id)
+
+            self.buffer.clear()
+
+    def commit(self):
+        self.stage_block()
+
+        self.blob_client.commit_block_list(
+            [BlobBlock(block_id=block_id) for block_id in self.block_ids]
+        )
+
+
+@trace_spans
 class Blob_Operation:
     """
     Description :   This class is used for performing blob operations required by the service
@@ -23,6 +85,16 @@ class Blob_Operation:
 
         self.connection_string = environ["AZURE_CONN_STR"]
 
+        self.pool_config = self.config["blob_client"]
+
+        self.upload_config = self.config["blob_upload"]
+
+        self.frame_config = self.config["frame_store"]
+
+        self.download_workers = self.config["blob_download"]["max_workers"]
+
+        self.prefetch = self.config["blob_download"]["prefetch"]
+
         self.container = self.config["blob_container"]
 
         self.dir = self.config["dir"]
@@ -49,11 +121,11 @@ class Blob_Operation:
         self.log_writer.start_log("start", self.class_name, method_name, log_file)
 
         try:
-            container_client = ContainerClient.from_connection_string(
-                conn_str=self.connection_string, container=self.container[container]
+            container_client = get_pooled_container_client(
+                self.connection_string, self.container[container], self.pool_config
             )
 
-            self.log_writer.log("Got container client from connection string", log_file)
+            self.log_writer.log("Got container client from client pool", log_file)
 
             self.log_writer.start_log("exit", self.class_name, method_name, log_file)
 
@@ -79,9 +151,7 @@ class Blob_Operation:
         self.log_writer.start_log("start", self.class_name, method_name, log_file)
 
         try:
-            client = BlobServiceClient.from_connection_string(
-                conn_str=self.connection_string
-            )
+            client = get_pooled_service_client(self.connection_string, self.pool_config)
 
             self.log_writer.log(
                 "Got BlobServiceClient from sonnection string", log_file
@@ -239,12 +309,46 @@ class Blob_Operation:
         except Exception as e:
             self.log_writer.exception_log(e, self.class_name, method_name, log_file)
 
+    def get_frame_fname(self, fname, log_file):
+        """
+        Method Name :   get_frame_fname
+        Description :   This method gets the blob name of the dataframe file based on the format set for the feature store
+
+        Output      :   The blob name with the extension of the feature store format is returned
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.get_frame_fname.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, log_file)
+
+        try:
+            frame_fname = fname
+
+            if self.frame_config["format"] == "parquet":
+                frame_fname = fname.replace(".csv", ".parquet")
+
+            self.log_writer.log(
+                f"Got {frame_fname} as file name for {self.frame_config['format']} format",
+                log_file,
+            )
+
+            self.log_writer.start_log("exit", self.class_name, method_name, log_file)
+
+            return frame_fname
+
+        except Exception as e:
+            self.log_writer.exception_log(e, self.class_name, method_name, log_file)
+
     def read_csv_from_folder(self, folder_name, container, log_file):
         """
         Method Name :   read_csv_from_folder
         Description :   This method reads the csv file from a folder present in the container
         
-        Output      :   A list of tuple of dataframe,file name and absolute file name is returned
+        Output      :   A list of tuple of dataframe,file name and absolute file name is returned. The files are downloaded
+                        concurrently by a bounded thread pool and the order of the files is kept
         On Failure  :   Write an exception log and then raise an exception
         
         Version     :   1.2
@@ -256,11 +360,19 @@ class Blob_Operation:
         try:
             files = self.get_files_from_folder(folder_name, container, log_file)
 
-            lst = [
-                (self.read_csv(f, container, log_file), f, f.split("/")[-1],)
-                for f in files
-                if f.endswith(".csv")
-            ]
+            csv_files = [f for f in files if f.endswith(".csv")]
+
+            with ThreadPoolExecutor(max_workers=self.download_workers) as executor:
+                dfs = executor.map(
+                    lambda f: self.read_csv(f, container, log_file), csv_files
+                )
+
+                lst = [(df, f, f.split("/")[-1]) for df, f in zip(dfs, csv_files)]
+
+            self.log_writer.log(
+                f"Downloaded {len(lst)} csv files with {self.download_workers} workers",
+                log_file,
+            )
 
             self.log_writer.log(
                 f"Read csv files from {folder_name} folder from {container} container",
@@ -274,6 +386,55 @@ class Blob_Operation:
         except Exception as e:
             self.log_writer.exception_log(e, self.class_name, method_name, log_file)
 
+    def iter_csv_from_folder(self, folder_name, container, log_file):
+        """
+        Method Name :   iter_csv_from_folder
+        Description :   This method lazily reads the csv files from particular folder in container, only the next few files
+                        as set by the prefetch parameter are downloaded in the background while the current file is processed
+
+        Output      :   A generator of tuple of dataframe,path of file with file name, and exact file name is returned
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.iter_csv_from_folder.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, log_file)
+
+        try:
+            files = self.get_files_from_folder(folder_name, container, log_file)
+
+            csv_files = [f for f in files if f.endswith(".csv")]
+
+            with ThreadPoolExecutor(max_workers=self.download_workers) as executor:
+                pending = deque()
+
+                for f in csv_files:
+                    pending.append(
+                        (executor.submit(self.read_csv, f, container, log_file), f)
+                    )
+
+                    if len(pending) > self.prefetch:
+                        future, fname = pending.popleft()
+
+                        yield future.result(), fname, fname.split("/")[-1]
+
+                while pending:
+                    future, fname = pending.popleft()
+
+                    yield future.result(), fname, fname.split("/")[-1]
+
+            self.log_writer.log(
+                f"Streamed csv files from {folder_name} folder from {container} container",
+                log_file,
+            )
+
+            self.log_writer.start_log("exit", self.class_name, method_name, log_file)
+
+        except Exception as e:
+            self.log_writer.exception_log(e, self.class_name, method_name, log_file)
+
     def delete_file(self, fname, container, log_file):
         """
         Method Name :   delete_file
@@ -415,9 +576,11 @@ class Blob_Operation:
     ):
         """
         Method Name :   upload_df_as_csv
-        Description :   This method uploads the dataframe as csv file to blob container
+        Description :   This method uploads the dataframe as csv file to blob container. The dataframe is serialized in memory,
+                        and large dataframes are streamed in chunks of rows, so no local copy is written. The local_fname
+                        parameter is kept for the existing callers and is not used
         
-        Output      :   The dataframe is uploaded to blob container as a csv file
+        Output      :   The dataframe is uploaded to blob container as a csv file, replacing the existing file
         On Failure  :   Write an exception log and then raise an exception
         
         Version     :   1.2
@@ -428,13 +591,220 @@ class Blob_Operation:
         self.log_writer.start_log("start", self.class_name, method_name, log_file)
 
         try:
-            dataframe.to_csv(self.files[local_fname], index=None, header=True)
+            client = self.get_container_client(container, log_file)
+
+            chunk_rows = self.upload_config["chunk_rows"]
+
+            if len(dataframe) > chunk_rows:
+                data = (
+                    dataframe.iloc[i : i + chunk_rows]
+                    .to_csv(index=None, header=i == 0)
+                    .encode()
+                    for i in range(0, len(dataframe), chunk_rows)
+                )
+
+            else:
+                data = dataframe.to_csv(index=None, header=True).encode()
+
+            client.upload_blob(
+                name=self.files[container_fname], data=data, overwrite=True
+            )
+
+            self.log_writer.log(
+                f"Uploaded dataframe to {container} container with name as {container_fname} file",
+                log_file,
+            )
+
+            self.log_writer.start_log("exit", self.class_name, method_name, log_file)
+
+        except Exception as e:
+            self.log_writer.exception_log(e, self.class_name, method_name, log_file)
+
+    def write_frame(self, dataframe, fname, container, log_file):
+        """
+        Method Name :   write_frame
+        Description :   This method uploads the dataframe to blob container in the format set for the feature store.
+                        Parquet files are compressed with the codec set for the feature store
+
+        Output      :   The dataframe is uploaded to blob container, replacing the existing file
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.write_frame.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, log_file)
+
+        try:
+            if isinstance(dataframe, Series):
+                dataframe = dataframe.to_frame()
+
+            if self.frame_config["format"] == "parquet":
+                frame_fname = self.get_frame_fname(self.files[fname], log_file)
+
+                client = self.get_container_client(container, log_file)
+
+                buffer = BytesIO()
+
+                dataframe.to_parquet(
+                    buffer, index=False, compression=self.frame_config["compression"]
+                )
+
+                client.upload_blob(
+                    name=frame_fname, data=buffer.getvalue(), overwrite=True
+                )
+
+            else:
+                self.upload_df_as_csv(dataframe, fname, fname, container, log_file)
 
             self.log_writer.log(
-                f"Created a local copy of dataframe with name {local_fname}", log_file
+                f"Uploaded dataframe to {container} container as {fname} in {self.frame_config['format']} format",
+                log_file,
             )
 
-            self.upload_file(local_fname, container_fname, container, log_file)
+            self.log_writer.start_log("exit", self.class_name, method_name, log_file)
+
+        except Exception as e:
+            self.log_writer.exception_log(e, self.class_name, method_name, log_file)
+
+    def normalize_frame(self, dataframe, log_file, schema=None):
+        """
+        Method Name :   normalize_frame
+        Description :   This method normalizes the column types of a dataframe written to a parquet file in parts, so
+                        that the types do not depend on the values in the part. Numeric columns, and object columns
+                        holding only numbers or missing values, are converted to float64 and the other columns to
+                        strings. When the schema of the file is given the columns follow the types in the schema
+
+        Output      :   The dataframe with normalized column types and its arrow schema are returned
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.normalize_frame.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, log_file)
+
+        try:
+            columns = {}
+
+            for col in dataframe.columns:
+                values = dataframe[col]
+
+                if is_numeric_dtype(values):
+                    numeric = values
+
+                elif values.dtype == object:
+                    numeric = to_numeric(values, errors="coerce")
+
+                    if numeric.notna().sum() != values.notna().sum():
+                        numeric = None
+
+                else:
+                    numeric = None
+
+                field_type = None if schema is None else schema.field(col).type
+
+                if numeric is not None and field_type in (None, float64()):
+                    columns[col] = numeric.astype("float64")
+
+                elif field_type == float64():
+                    raise ValueError(
+                        f"Column {col} has non numeric values but is float64 in the file schema"
+                    )
+
+                else:
+                    columns[col] = values.astype(str).where(values.notna())
+
+            df = DataFrame(columns, index=dataframe.index)
+
+            if schema is None:
+                schema = arrow_schema(
+                    [
+                        (col, float64() if df[col].dtype == "float64" else string())
+                        for col in df.columns
+                    ]
+                )
+
+            self.log_writer.log(
+                f"Normalized {len(df.columns)} column types of dataframe", log_file
+            )
+
+            self.log_writer.start_log("exit", self.class_name, method_name, log_file)
+
+            return df, schema
+
+        except Exception as e:
+            self.log_writer.exception_log(e, self.class_name, method_name, log_file)
+
+    def write_frame_parts(self, frames, fname, container, log_file):
+        """
+        Method Name :   write_frame_parts
+        Description :   This method uploads an iterable of dataframes to blob container as a single file in the format
+                        set for the feature store. Each dataframe is written as a parquet row group or as csv rows and
+                        staged as blocks of the blob as it arrives, so only one dataframe is held in memory. Parquet
+                        column types are normalized so that every row group has the same schema
+
+        Output      :   The dataframes are uploaded to blob container as one file, replacing the existing file
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.write_frame_parts.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, log_file)
+
+        try:
+            frame_fname = self.get_frame_fname(self.files[fname], log_file)
+
+            client = self.get_container_client(container, log_file).get_blob_client(
+                frame_fname
+            )
+
+            sink = Block_Sink(client, self.frame_config["block_bytes"])
+
+            writer, columns, rows = None, None, 0
+
+            for df in frames:
+                if columns is None:
+                    columns = df.columns
+
+                df = df.reindex(columns=columns)
+
+                if self.frame_config["format"] == "parquet":
+                    df, schema = self.normalize_frame(
+                        df, log_file, schema=None if writer is None else writer.schema
+                    )
+
+                    table = Table.from_pandas(df, schema=schema, preserve_index=False)
+
+                    if writer is None:
+                        writer = ParquetWriter(
+                            sink, schema, compression=self.frame_config["compression"]
+                        )
+
+                    writer.write_table(table)
+
+                else:
+                    sink.write(df.to_csv(index=None, header=rows == 0).encode())
+
+                rows += len(df)
+
+            if columns is None:
+                self.write_frame(DataFrame(), fname, container, log_file)
+
+            else:
+                if writer is not None:
+                    writer.close()
+
+                sink.commit()
+
+            self.log_writer.log(
+                f"Uploaded {rows} rows to {container} container as {frame_fname} in {len(sink.block_ids)} blocks",
+                log_file,
+            )
 
             self.log_writer.start_log("exit", self.class_name, method_name, log_file)
 
@@ -470,7 +840,7 @@ class Blob_Operation:
 
                 dest_f = folder + "/" + f
 
-                self.upload_file(local_f, dest_f, container, log_file)
+                self.upload_file(local_f, dest_f, container, log_file, delete=delete)
 
             if delete is True:
                 rmtree(folder)
@@ -1,6 +1,11 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
 from blob_operations import Blob_Operation
 from mongo_db_operations import MongoDB_Operation
 from utils.logger import App_Logger
+from utils.main_utils import Main_Utils
+from utils.read_params import read_params
 
 
 class DB_Operation_Pred:
@@ -14,16 +19,54 @@ class DB_Operation_Pred:
     def __init__(self):
         self.class_name = self.__class__.__name__
 
+        self.config = read_params()
+
+        self.insert_workers = self.config["mongodb_insert"]["max_workers"]
+
         self.blob = Blob_Operation()
 
         self.mongo = MongoDB_Operation()
 
+        self.utils = Main_Utils()
+
         self.log_writer = App_Logger()
 
+    def ingest_good_data_file(
+        self, data_frame, good_data_db_name, good_data_collection_name
+    ):
+        """
+        Method Name :   ingest_good_data_file
+        Description :   This method inserts the good data file in MongoDB. Quotes are added to the dataframe before it
+                        is inserted, which leaves files already transformed by the data transform stage as they are and
+                        transforms them when that stage is skipped
+
+        Output      :   The good data file is inserted in MongoDB
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.ingest_good_data_file.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, "db_insert")
+
+        try:
+            data_frame = self.utils.quote_string_columns(data_frame, "db_insert")
+
+            self.mongo.insert_dataframe_as_record(
+                data_frame, good_data_db_name, good_data_collection_name, "db_insert"
+            )
+
+            self.log_writer.start_log("exit", self.class_name, method_name, "db_insert")
+
+        except Exception as e:
+            self.log_writer.exception_log(e, self.class_name, method_name, "db_insert")
+
     def insert_good_data_as_record(self, good_data_db_name, good_data_collection_name):
         """
         Method Name :   insert_good_data_as_record
-        Description :   This method inserts the good data in MongoDB as collection
+        Description :   This method inserts the good data in MongoDB as collection, the files are inserted
+                        concurrently over the shared mongo client with at most max_workers files in flight
 
         Output      :   A MongoDB collection is created with good data present in it
         On Failure  :   Write an exception log and then raise an exception
@@ -36,20 +79,32 @@ class DB_Operation_Pred:
         self.log_writer.start_log("start", self.class_name, method_name, "db_insert")
 
         try:
-            lst = self.blob.read_csv_from_folder(
+            lst = self.blob.iter_csv_from_folder(
                 "pred_good_data", "pred_data", "db_insert"
             )
 
-            for _, f in enumerate(lst):
-                df = f[0]
+            with ThreadPoolExecutor(max_workers=self.insert_workers) as executor:
+                pending = deque()
 
-                self.mongo.insert_dataframe_as_record(
-                    df, good_data_db_name, good_data_collection_name, "db_insert"
-                )
+                for f in lst:
+                    pending.append(
+                        executor.submit(
+                            self.ingest_good_data_file,
+                            f[0],
+                            good_data_db_name,
+                            good_data_collection_name,
+                        )
+                    )
 
-                self.log_writer.log(
-                    "Inserted dataframe as collection record in mongodb", "db_insert"
-                )
+                    if len(pending) >= self.insert_workers:
+                        pending.popleft().result()
+
+                for future in pending:
+                    future.result()
+
+            self.log_writer.log(
+                "Inserted dataframes as collection record in mongodb", "db_insert"
+            )
 
             self.log_writer.start_log("exit", self.class_name, method_name, "db_insert")
 
@@ -59,7 +114,8 @@ class DB_Operation_Pred:
     def export_collection_to_csv(self, good_data_db_name, good_data_collection_name):
         """
         Method Name :   export_collection_to_csv
-        Description :   This method inserts the good data in MongoDB as collection
+        Description :   This method exports the good data collection from MongoDB to the feature store, the
+                        collection is streamed in chunks and written to blob in parts so memory stays bounded
 
         Output      :   A csv file stored in input files container, containing good data which was stored in MongoDB
         On Failure  :   Write an exception log and then raise an exception
@@ -72,15 +128,15 @@ class DB_Operation_Pred:
         self.log_writer.start_log("start", self.class_name, method_name, "export_csv")
 
         try:
-            df = self.mongo.get_collection_as_dataframe(
-                good_data_db_name, good_data_collection_name, "export_csv",
+            frames = self.mongo.iter_collection_as_dataframe(
+                good_data_db_name, good_data_collection_name, "export_csv"
             )
 
-            self.blob.upload_df_as_csv(
-                df, "pred_export", "pred_export", "feature_store", "export_csv"
+            self.blob.write_frame_parts(
+                frames, "pred_export", "feature_store", "export_csv"
             )
 
-            self.log_writer.log("Exported dataframe to csv file", "export_csv")
+            self.log_writer.log("Exported dataframe to feature store", "export_csv")
 
             self.log_writer.start_log(
                 "exit", self.class_name, method_name, "export_csv"
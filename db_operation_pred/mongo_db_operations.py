@@ -1,13 +1,53 @@
-from json import loads
 from os import environ
+from threading import Lock
 
-from pandas import DataFrame
+from pandas import DataFrame, concat
 from pymongo import MongoClient
 
-from utils.logger import App_Logger
+from utils.local_mongo import Local_Mongo_Client
+from utils.logger import App_Logger, trace_spans
 from utils.read_params import read_params
 
+_mongo_lock = Lock()
 
+_mongo_clients = {}
+
+
+def get_pooled_mongo_client(db_url, max_pool_size, backend="mongodb"):
+    """
+    Method Name :   get_pooled_mongo_client
+    Description :   This method gets the process wide mongo client for the db url, the client is created once and its
+                    connection pool is shared by every MongoDB_Operation and by the threads inserting records
+                    With the local backend the db url is the path of the sqlite file of the local stand in client
+
+    Output      :   The pooled mongo client for the db url is returned
+    On Failure  :   Write an exception log and then raise an exception
+
+    Version     :   1.2
+    Revisions   :   moved setup to cloud
+    """
+    method_name = get_pooled_mongo_client.__name__
+
+    try:
+        with _mongo_lock:
+            if db_url not in _mongo_clients:
+                if backend == "local":
+                    _mongo_clients[db_url] = Local_Mongo_Client(db_url)
+
+                else:
+                    _mongo_clients[db_url] = MongoClient(
+                        db_url, maxPoolSize=max_pool_size
+                    )
+
+            return _mongo_clients[db_url]
+
+    except Exception as e:
+        raise Exception(
+            f"Exception occured in {__file__}, Method : {method_name}, Error : {str(e)}"
+        )
+
+
+@trace_spans
 class MongoDB_Operation:
     """
     Description :   This method is used for all mongodb operations
@@ -23,9 +63,23 @@ class MongoDB_Operation:
 
         self.mongo_config = self.config["mongodb"]
 
-        self.DB_URL = environ["MONGODB_URL"]
+        self.insert_config = self.config["mongodb_insert"]
+
+        self.export_config = self.config["mongodb_export"]
+
+        self.backend_config = self.config["mongodb_backend"]
 
-        self.client = MongoClient(self.DB_URL)
+        if self.backend_config["type"] == "local":
+            self.DB_URL = self.backend_config["local_path"]
+
+        else:
+            self.DB_URL = environ["MONGODB_URL"]
+
+        self.client = get_pooled_mongo_client(
+            self.DB_URL,
+            self.insert_config["max_pool_size"],
+            self.backend_config["type"],
+        )
 
         self.log_writer = App_Logger()
 
@@ -85,6 +139,56 @@ class MongoDB_Operation:
         except Exception as e:
             self.log_writer.exception_log(e, self.class_name, method_name, log_file)
 
+    def iter_collection_as_dataframe(self, db_name, collection_name, log_file):
+        """
+        Method Name :   iter_collection_as_dataframe
+        Description :   This method streams the selected collection as dataframes of chunk_rows rows, the _id field is
+                        projected out by the server and the cursor fetches batch_size documents at a time
+
+        Output      :   A generator of dataframes of the selected db_name and collection_name is returned
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.iter_collection_as_dataframe.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, log_file)
+
+        try:
+            database = self.get_database(db_name, log_file)
+
+            collection = self.get_collection(database, collection_name, log_file)
+
+            cursor = collection.find(
+                {}, {"_id": 0}, batch_size=self.export_config["batch_size"]
+            )
+
+            chunk_rows, docs, num_chunks = self.export_config["chunk_rows"], [], 0
+
+            for doc in cursor:
+                docs.append(doc)
+
+                if len(docs) == chunk_rows:
+                    yield DataFrame(docs)
+
+                    docs, num_chunks = [], num_chunks + 1
+
+            if docs:
+                yield DataFrame(docs)
+
+                num_chunks += 1
+
+            self.log_writer.log(
+                f"Streamed {collection_name} collection as {num_chunks} dataframes",
+                log_file,
+            )
+
+            self.log_writer.start_log("exit", self.class_name, method_name, log_file)
+
+        except Exception as e:
+            self.log_writer.exception_log(e, self.class_name, method_name, log_file)
+
     def get_collection_as_dataframe(self, db_name, collection_name, log_file):
         """
         Method Name :   get_collection_as_dataframe
@@ -101,14 +205,11 @@ class MongoDB_Operation:
         self.log_writer.start_log("start", self.class_name, method_name, log_file)
 
         try:
-            database = self.get_database(db_name, log_file)
-
-            collection = self.get_collection(database, collection_name, log_file)
-
-            df = DataFrame(list(collection.find()))
+            frames = list(
+                self.iter_collection_as_dataframe(db_name, collection_name, log_file)
+            )
 
-            if "_id" in df.columns.to_list():
-                df = df.drop(columns=["_id"], axis=1)
+            df = concat(frames, ignore_index=True) if frames else DataFrame()
 
             self.log_writer.log("Converted collection to dataframe", log_file)
 
@@ -124,7 +225,9 @@ class MongoDB_Operation:
     ):
         """
         Method Name :   insert_dataframe_as_record
-        Description :   This method inserts the dataframe as record in database collection
+        Description :   This method inserts the dataframe as record in database collection. The rows are converted
+                        to documents in chunks of chunk_size rows and each chunk is inserted with an unordered
+                        insert_many, so that a failed document does not stop the rest of the chunk
 
         Output      :   The dataframe is inserted in database collection
         On Failure  :   Write an exception log and then raise an exception
@@ -137,19 +240,23 @@ class MongoDB_Operation:
         self.log_writer.start_log("start", self.class_name, method_name, log_file)
 
         try:
-            records = loads(data_frame.T.to_json()).values()
-
-            self.log_writer.log(f"Converted dataframe to json records", log_file)
-
             database = self.get_database(db_name, log_file)
 
             collection = self.get_collection(database, collection_name, log_file)
 
+            chunk_size = self.insert_config["chunk_size"]
+
             self.log_writer.log("Inserting records to MongoDB", log_file)
 
-            collection.insert_many(records)
+            for i in range(0, len(data_frame), chunk_size):
+                records = data_frame.iloc[i : i + chunk_size].to_dict("records")
 
-            self.log_writer.log("Inserted records to MongoDB", log_file)
+                collection.insert_many(records, ordered=False)
+
+            self.log_writer.log(
+                f"Inserted {len(data_frame)} records to MongoDB in chunks of {chunk_size} rows",
+                log_file,
+            )
 
             self.log_writer.start_log("exit", self.class_name, method_name, log_file)
 
@@ -1,5 +1,5 @@
 from data_type_valid_pred import DB_Operation_Pred
-from utils.logger import App_Logger
+from utils.logger import App_Logger, print_span_summary
 from utils.main_utils import Main_Utils
 
 
@@ -40,7 +40,7 @@ class Run:
 
             self.db_operation.export_collection_to_csv("db_name", "collection_name")
 
-            self.log_writer.log(
+            self.log_writer.summary(
                 "Data type validation Operation completed !!", "db_main"
             )
 
@@ -60,6 +60,10 @@ if __name__ == "__main__":
         raise e
 
     finally:
-        utils = Main_Utils()
+        try:
+            utils = Main_Utils()
+
+            utils.upload_logs()
 
-        utils.upload_logs()
+        finally:
+            print_span_summary()
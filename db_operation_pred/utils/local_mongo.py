@@ -0,0 +1,429 @@
+from collections import namedtuple
+from json import dumps, loads
+from math import isfinite
+from sqlite3 import IntegrityError, connect
+from threading import Lock, local
+
+SQL_OPS = {"$eq": "=", "$ne": "!=", "$gt": ">", "$gte": ">=", "$lt": "<", "$lte": "<="}
+
+ID_EXPR = "coalesce(id, seq)"
+
+Local_Update_One = namedtuple(
+    "Local_Update_One", ["filter", "update", "upsert"], defaults=(False,)
+)
+
+
+def to_json_value(value):
+    """
+    Method Name :   to_json_value
+    Description :   This method converts a document value to a value that is valid json, NaN and infinite floats
+                    are converted to None as missing values are stored as NaN in the dataframes
+
+    Output      :   The json compatible value is returned
+    On Failure  :   Write an exception log and then raise an exception
+
+    Version     :   1.2
+    Revisions   :   moved setup to cloud
+    """
+    if isinstance(value, float) and not isfinite(value):
+        return None
+
+    if isinstance(value, dict):
+        return {k: to_json_value(v) for k, v in value.items()}
+
+    if isinstance(value, (list, tuple)):
+        return [to_json_value(v) for v in value]
+
+    return value
+
+
+def get_field_expr(key):
+    """
+    Method Name :   get_field_expr
+    Description :   This method gets the sql expression of a top level field of the stored documents, the _id field
+                    is the explicit id of the document or its insertion sequence when it was generated
+
+    Output      :   The sql expression of the field is returned
+    On Failure  :   Write an exception log and then raise an exception
+
+    Version     :   1.2
+    Revisions   :   moved setup to cloud
+    """
+    if key == "_id":
+        return ID_EXPR
+
+    return "json_extract(doc, '$.\"" + key.replace('"', '""') + "\"')"
+
+
+def get_where(query):
+    """
+    Method Name :   get_where
+    Description :   This method converts a mongodb query to a sql where clause. Equality, $ne, $gt, $gte, $lt, $lte,
+                    $in and $exists on top level fields are supported
+
+    Output      :   The where clause and its arguments are returned
+    On Failure  :   Write an exception log and then raise an exception
+
+    Version     :   1.2
+    Revisions   :   moved setup to cloud
+    """
+    clauses, args = [], []
+
+    for key, cond in query.items():
+        expr = get_field_expr(key)
+
+        if not (isinstance(cond, dict) and all(str(k).startswith("$") for k in cond)):
+            cond = {"$eq": cond}
+
+        for op, value in cond.items():
+            if op == "$exists":
+                null_expr = (
+                    "1" if key == "_id" else expr.replace("json_extract", "json_type")
+                )
+
+                clauses.append(f"{null_expr} IS {'NOT ' if value else ''}NULL")
+
+            elif op == "$in":
+                clauses.append(f"{expr} IN ({', '.join('?' * len(value))})")
+
+                args.extend(value)
+
+            elif op in SQL_OPS:
+                clauses.append(f"{expr} {SQL_OPS[op]} ?")
+
+                args.append(value)
+
+            else:
+                raise ValueError(f"Unsupported query operator {op}")
+
+    return " AND ".join(clauses) or "1", args
+
+
+def apply_projection(doc, projection):
+    """
+    Method Name :   apply_projection
+    Description :   This method applies a mongodb projection to the document, the projection either includes or
+                    excludes the fields and _id is kept unless it is excluded
+
+    Output      :   The projected document is returned
+    On Failure  :   Write an exception log and then raise an exception
+
+    Version     :   1.2
+    Revisions   :   moved setup to cloud
+    """
+    if not projection:
+        return doc
+
+    included = [k for k, v in projection.items() if v]
+
+    if included:
+        keep = set(included) | ({"_id"} if projection.get("_id", 1) else set())
+
+        return {k: v for k, v in doc.items() if k in keep}
+
+    return {k: v for k, v in doc.items() if projection.get(k, 1)}
+
+
+class Local_Result:
+    """
+    Description :   This class is used for returning the counts of a write to the local mongodb stand in, with the
+                    same attribute names as the pymongo write results
+
+    Version     :   1.2
+    Revisions   :   Moved to setup to cloud
+    """
+
+    def __init__(self, inserted_count=0, matched_count=0, upserted_count=0):
+        self.inserted_count = inserted_count
+
+        self.matched_count = matched_count
+
+        self.upserted_count = upserted_count
+
+
+class Local_Collection:
+    """
+    Description :   This class is used as a stand in for a mongodb collection, the documents are stored as json in a
+                    sqlite table with their explicit _id, and the generated _id is the insertion sequence so it
+                    increases with every insert like an ObjectId
+
+    Version     :   1.2
+    Revisions   :   Moved to setup to cloud
+    """
+
+    def __init__(self, client, db_name, collection_name):
+        self.client = client
+
+        self.name = collection_name
+
+        self.full_name = db_name + "." + collection_name
+
+        self.table = '"' + self.full_name.replace('"', '""') + '"'
+
+        with self.client.write_lock, self.client.get_connection() as conn:
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} "
+                "(seq INTEGER PRIMARY KEY AUTOINCREMENT, id UNIQUE, doc TEXT NOT NULL)"
+            )
+
+    def to_row(self, doc):
+        doc = dict(doc)
+
+        return doc.pop("_id", None), dumps(
+            to_json_value(doc), default=str, allow_nan=False
+        )
+
+    def to_doc(self, row):
+        return {"_id": row[0], **loads(row[1])}
+
+    def create_index(self, key, unique=False, partialFilterExpression=None, **kwargs):
+        """
+        Method Name :   create_index
+        Description :   This method creates an index on a top level field of the documents, the index leaves out the
+                        documents without the field when a partial filter expression is given
+
+        Output      :   The index is created on the collection table
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        expr = get_field_expr(key)
+
+        index = '"' + (self.full_name + "." + key).replace('"', '""') + '"'
+
+        where = f" WHERE {expr} IS NOT NULL" if partialFilterExpression else ""
+
+        with self.client.write_lock, self.client.get_connection() as conn:
+            conn.execute(
+                f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS {index} "
+                f"ON {self.table} ({expr}){where}"
+            )
+
+        return key
+
+    def find(self, filter=None, projection=None, sort=None, limit=0, batch_size=1000):
+        """
+        Method Name :   find
+        Description :   This method finds the documents matching the query, the rows are fetched from sqlite
+                        batch_size rows at a time
+
+        Output      :   A generator of the projected documents is returned
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        where, args = get_where(filter or {})
+
+        order = ", ".join(
+            f"{get_field_expr(k)} {'DESC' if d == -1 else 'ASC'}" for k, d in sort or []
+        )
+
+        sql = f"SELECT {ID_EXPR}, doc FROM {self.table} WHERE {where}"
+
+        sql += f" ORDER BY {order}" if order else ""
+
+        sql += f" LIMIT {int(limit)}" if limit else ""
+
+        cursor = self.client.get_connection().execute(sql, args)
+
+        while True:
+            rows = cursor.fetchmany(batch_size)
+
+            if not rows:
+                break
+
+            for row in rows:
+                yield apply_projection(self.to_doc(row), projection)
+
+    def find_one(self, filter=None, projection=None, sort=None):
+        return next(self.find(filter, projection, sort=sort, limit=1), None)
+
+    def insert_many(self, documents, ordered=True):
+        """
+        Method Name :   insert_many
+        Description :   This method inserts the documents in a single transaction, documents with a duplicate _id or
+                        unique field are skipped when ordered is False
+
+        Output      :   The documents are inserted in the collection table
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        inserted = 0
+
+        with self.client.write_lock, self.client.get_connection() as conn:
+            for doc in documents:
+                try:
+                    conn.execute(
+                        f"INSERT INTO {self.table} (id, doc) VALUES (?, ?)",
+                        self.to_row(doc),
+                    )
+
+                    inserted += 1
+
+                except IntegrityError:
+                    if ordered is True:
+                        raise
+
+        return Local_Result(inserted_count=inserted)
+
+    def upsert(self, conn, filter, update, upsert):
+        where, args = get_where(filter)
+
+        row = conn.execute(
+            f"SELECT {ID_EXPR}, doc, seq FROM {self.table} WHERE {where} LIMIT 1", args
+        ).fetchone()
+
+        if row is not None:
+            if update.get("$set"):
+                doc = {**self.to_doc(row), **update["$set"]}
+
+                conn.execute(
+                    f"UPDATE {self.table} SET doc = ? WHERE seq = ?",
+                    (self.to_row(doc)[1], row[2]),
+                )
+
+            return Local_Result(matched_count=1)
+
+        if upsert is not True:
+            return Local_Result()
+
+        doc = {
+            k: v
+            for k, v in filter.items()
+            if not (isinstance(v, dict) and any(str(c).startswith("$") for c in v))
+        }
+
+        doc.update(update.get("$setOnInsert", {}))
+
+        doc.update(update.get("$set", {}))
+
+        conn.execute(
+            f"INSERT INTO {self.table} (id, doc) VALUES (?, ?)", self.to_row(doc)
+        )
+
+        return Local_Result(upserted_count=1)
+
+    def update_one(self, filter, update, upsert=False):
+        """
+        Method Name :   update_one
+        Description :   This method applies the $set and $setOnInsert update to the first document matching the
+                        query, a document is inserted from the equality fields of the query when upsert is set
+
+        Output      :   The counts of the matched and upserted documents are returned
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        with self.client.write_lock, self.client.get_connection() as conn:
+            return self.upsert(conn, filter, update, upsert)
+
+    def bulk_write(self, requests, ordered=True):
+        """
+        Method Name :   bulk_write
+        Description :   This method applies the Local_Update_One requests in a single transaction, requests that hit
+                        a unique index are skipped when ordered is False like the duplicate key errors of mongodb
+
+        Output      :   The counts of the matched and upserted documents are returned
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        result = Local_Result()
+
+        with self.client.write_lock, self.client.get_connection() as conn:
+            for request in requests:
+                try:
+                    res = self.upsert(
+                        conn, request.filter, request.update, request.upsert
+                    )
+
+                except IntegrityError:
+                    if ordered is True:
+                        raise
+
+                    continue
+
+                result.matched_count += res.matched_count
+
+                result.upserted_count += res.upserted_count
+
+        return result
+
+
+class Local_Database:
+    """
+    Description :   This class is used as a stand in for a mongodb database, the collections of the database are
+                    tables in the sqlite file of the client
+
+    Version     :   1.2
+    Revisions   :   Moved to setup to cloud
+    """
+
+    def __init__(self, client, db_name):
+        self.client = client
+
+        self.name = db_name
+
+        self.collections = {}
+
+    def __getitem__(self, collection_name):
+        if collection_name not in self.collections:
+            self.collections[collection_name] = Local_Collection(
+                self.client, self.name, collection_name
+            )
+
+        return self.collections[collection_name]
+
+
+class Local_Mongo_Client:
+    """
+    Description :   This class is used as an in process stand in for the mongo client, backed by a local sqlite file.
+                    It supports the subset of the pymongo api used by MongoDB_Operation, so the database stages can
+                    be run and benchmarked without a mongodb server
+
+    Version     :   1.2
+    Revisions   :   Moved to setup to cloud
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+
+        self.connections = local()
+
+        self.write_lock = Lock()
+
+        self.databases = {}
+
+        with self.get_connection() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+
+    def get_connection(self):
+        """
+        Method Name :   get_connection
+        Description :   This method gets the sqlite connection of the calling thread, a connection is opened once for
+                        every thread so that the inserting threads can read while another thread writes
+
+        Output      :   The sqlite connection of the thread is returned
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        conn = getattr(self.connections, "conn", None)
+
+        if conn is None:
+            conn = self.connections.conn = connect(self.db_path, timeout=30)
+
+        return conn
+
+    def __getitem__(self, db_name):
+        if db_name not in self.databases:
+            self.databases[db_name] = Local_Database(self, db_name)
+
+        return self.databases[db_name]
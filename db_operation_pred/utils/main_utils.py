@@ -21,6 +21,8 @@ class Main_Utils:
 
         self.log_dir = self.config["dir"]["log"]
 
+        self.transform_config = self.config["data_transform"]
+
         self.class_name = self.__class__.__name__
 
     def upload_logs(self):
@@ -39,7 +41,14 @@ class Main_Utils:
         self.log_writer.start_log("start", self.class_name, method_name, "upload")
 
         try:
-            self.blob.upload_folder(self.log_dir, "logs", "upload")
+            self.log_writer.flush()
+
+            shipping_failed = self.log_writer.shipping_failed()
+
+            if self.log_writer.ship_logs is False or shipping_failed is True:
+                self.blob.upload_folder(
+                    self.log_dir, "logs", "upload", delete=shipping_failed is False
+                )
 
             self.log_writer.log("Uploaded logs to logs container", "upload")
 
@@ -47,3 +56,44 @@ class Main_Utils:
 
         except Exception as e:
             self.log_writer.exception_log(e, self.class_name, method_name, "upload")
+
+    def quote_string_columns(self, df, log_file):
+        """
+        Method Name :   quote_string_columns
+        Description :   This method adds quotes to the values of the quote columns of the dataframe with vectorized
+                        string operations, values that are already quoted are left as they are so the transform can
+                        be applied again to the same data
+
+        Output      :   The dataframe with quotes added to the values of the quote columns is returned
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.quote_string_columns.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, log_file)
+
+        try:
+            for col in self.transform_config["quote_columns"]:
+                values = df[col].astype(str)
+
+                quoted = (
+                    values.str.startswith("'")
+                    & values.str.endswith("'")
+                    & (values.str.len() > 1)
+                )
+
+                df[col] = values.where(quoted, "'" + values + "'")
+
+            self.log_writer.log(
+                f"Quotes added to {list(self.transform_config['quote_columns'])} columns",
+                log_file,
+            )
+
+            self.log_writer.start_log("exit", self.class_name, method_name, log_file)
+
+            return df
+
+        except Exception as e:
+            self.log_writer.exception_log(e, self.class_name, method_name, log_file)
@@ -1,15 +1,78 @@
-from io import StringIO
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO, RawIOBase, StringIO
 from os import environ, listdir, remove
 from os.path import join
 from shutil import rmtree
 
-from azure.storage.blob import BlobServiceClient, ContainerClient
-from pandas import read_csv
+from azure.storage.blob import BlobBlock
+from pandas import DataFrame, Series, read_csv, to_numeric
+from pandas.api.types import is_numeric_dtype
+from pyarrow import Table, float64, string
+from pyarrow import schema as arrow_schema
+from pyarrow.parquet import ParquetFile, ParquetWriter
+from pyarrow.types import is_boolean, is_floating, is_integer, is_null
 
-from utils.logger import App_Logger
+from utils.client_pool import get_pooled_container_client, get_pooled_service_client
+from utils.logger import App_Logger, trace_spans
 from utils.read_params import read_params
 
 
+class Block_Sink(RawIOBase):
+    """
+    Description :   This class is used as a writable file which stages everything written to it as blocks of the blob,
+                    a block is staged once block_bytes are buffered and the blob is committed when the sink is closed
+
+    Version     :   1.2
+    Revisions   :   Moved to setup to cloud
+    """
+
+    def __init__(self, blob_client, block_bytes):
+        self.blob_client = blob_client
+
+        self.block_bytes = block_bytes
+
+        self.buffer = bytearray()
+
+        self.block_ids = []
+
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def tell(self):
+        return self.position
+
+    def write(self, data):
+        self.buffer += data
+
+        self.position += len(data)
+
+        if len(self.buffer) >= self.block_bytes:
+            self.stage_block()
+
+        return len(data)
+
+    def stage_block(self):
+        if self.buffer:
+            block_id = f"{len(self.block_ids):08d}"
+
+            self.blob_client.stage_block(block_id=block_id, data=bytes(self.buffer))
+
+            self.block_ids.append(block_id)
+
+            self.buffer.clear()
+
+    def commit(self):
+        self.stage_block()
+
+        self.blob_client.commit_block_list(
+            [BlobBlock(block_id=block_id) for block_id in self.block_ids]
+        )
+
+
+@trace_spans
 class Blob_Operation:
     """
     Description :   This class is used for performing blob operations required by the service
@@ -27,10 +90,22 @@ class Blob_Operation:
 
         self.dir = self.config["dir"]
 
+        self.files = self.config["files"]
+
         self.log_writer = App_Logger()
 
         self.connection_string = environ["AZURE_CONN_STR"]
 
+        self.pool_config = self.config["blob_client"]
+
+        self.upload_config = self.config["blob_upload"]
+
+        self.frame_config = self.config["frame_store"]
+
+        self.download_workers = self.config["blob_download"]["max_workers"]
+
+        self.prefetch = self.config["blob_download"]["prefetch"]
+
     def get_container_client(self, container, log_file):
         """
         Method Name :   get_container_client
@@ -47,12 +122,11 @@ class Blob_Operation:
         self.log_writer.start_log("start", self.class_name, method_name, log_file)
 
         try:
-            container_client = ContainerClient.from_connection_string(
-                conn_str=self.connection_string,
-                container_name=self.container[container],
+            container_client = get_pooled_container_client(
+                self.connection_string, self.container[container], self.pool_config
             )
 
-            self.log_writer.log("Got container client from connection string", log_file)
+            self.log_writer.log("Got container client from client pool", log_file)
 
             self.log_writer.start_log("exit", self.class_name, method_name, log_file)
 
@@ -77,13 +151,9 @@ class Blob_Operation:
         self.log_writer.start_log("start", self.class_name, method_name, log_file)
 
         try:
-            client = BlobServiceClient.from_connection_string(
-                conn_str=self.connection_string
-            )
+            client = get_pooled_service_client(self.connection_string, self.pool_config)
 
-            self.log_writer.log(
-                "Got BlobServiceClient from connection string", log_file
-            )
+            self.log_writer.log("Got BlobServiceClient from client pool", log_file)
 
             blob_client = client.get_blob_client(
                 container=self.container[container], blob=self.files[blob_fname]
@@ -337,6 +407,39 @@ class Blob_Operation:
         except Exception as e:
             self.log_writer.exception_log(e, self.class_name, method_name, log_file)
 
+    def get_frame_fname(self, fname, log_file):
+        """
+        Method Name :   get_frame_fname
+        Description :   This method gets the blob name of the dataframe file based on the format set for the feature store
+
+        Output      :   The blob name with the extension of the feature store format is returned
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.get_frame_fname.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, log_file)
+
+        try:
+            frame_fname = fname
+
+            if self.frame_config["format"] == "parquet":
+                frame_fname = fname.replace(".csv", ".parquet")
+
+            self.log_writer.log(
+                f"Got {frame_fname} as file name for {self.frame_config['format']} format",
+                log_file,
+            )
+
+            self.log_writer.start_log("exit", self.class_name, method_name, log_file)
+
+            return frame_fname
+
+        except Exception as e:
+            self.log_writer.exception_log(e, self.class_name, method_name, log_file)
+
     def get_files_from_folder(self, folder_name, container, log_file):
         """
         Method Name :   get_files_from_folder
@@ -377,7 +480,8 @@ class Blob_Operation:
         Description :   This method reads the csv files from particular folder in container
         
         Output      :   A list of tuple of dataframe,path of file with file name, and exact file name are returned from the particular 
-                        folder in container
+                        folder in container. The files are downloaded concurrently by a bounded thread pool and the order of
+                        the files is kept
         On Failure  :   Write an exception log and then raise an exception
         
         Version     :   1.2
@@ -390,11 +494,19 @@ class Blob_Operation:
         try:
             files = self.get_files_from_folder(folder_name, container, log_file)
 
-            lst = [
-                (self.read_csv(f, container, log_file), f, f.split("/")[-1],)
-                for f in files
-                if f.endswith(".csv")
-            ]
+            csv_files = [f for f in files if f.endswith(".csv")]
+
+            with ThreadPoolExecutor(max_workers=self.download_workers) as executor:
+                dfs = executor.map(
+                    lambda f: self.read_csv(f, container, log_file), csv_files
+                )
+
+                lst = [(df, f, f.split("/")[-1]) for df, f in zip(dfs, csv_files)]
+
+            self.log_writer.log(
+                f"Downloaded {len(lst)} csv files with {self.download_workers} workers",
+                log_file,
+            )
 
             self.log_writer.log(
                 f"Read csv files from {folder_name} folder from {container} container",
@@ -408,14 +520,102 @@ class Blob_Operation:
         except Exception as e:
             self.log_writer.exception_log(e, self.class_name, method_name, log_file)
 
+    def get_file_etags(self, folder_name, container, log_file):
+        """
+        Method Name :   get_file_etags
+        Description :   This method gets the etags of the csv files from particular folder in container, the etag
+                        changes whenever the content of the file is replaced
+
+        Output      :   A dict of file name and etag is returned
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.get_file_etags.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, log_file)
+
+        try:
+            client = self.get_container_client(container, log_file)
+
+            blob_list = client.list_blobs(name_starts_with=self.dir[folder_name] + "/")
+
+            etags = {f.name: f.etag for f in blob_list if f.name.endswith(".csv")}
+
+            self.log_writer.log(
+                f"Got etags of {len(etags)} files from {folder_name} folder from {container} container",
+                log_file,
+            )
+
+            self.log_writer.start_log("exit", self.class_name, method_name, log_file)
+
+            return etags
+
+        except Exception as e:
+            self.log_writer.exception_log(e, self.class_name, method_name, log_file)
+
+    def iter_csv_from_folder(self, folder_name, container, log_file, fnames=None):
+        """
+        Method Name :   iter_csv_from_folder
+        Description :   This method lazily reads the csv files from particular folder in container, only the next few files
+                        as set by the prefetch parameter are downloaded in the background while the current file is processed.
+                        When fnames is given only those files are read, without listing the folder
+
+        Output      :   A generator of tuple of dataframe,path of file with file name, and exact file name is returned
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.iter_csv_from_folder.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, log_file)
+
+        try:
+            if fnames is None:
+                fnames = self.get_files_from_folder(folder_name, container, log_file)
+
+            csv_files = [f for f in fnames if f.endswith(".csv")]
+
+            with ThreadPoolExecutor(max_workers=self.download_workers) as executor:
+                pending = deque()
+
+                for f in csv_files:
+                    pending.append(
+                        (executor.submit(self.read_csv, f, container, log_file), f)
+                    )
+
+                    if len(pending) > self.prefetch:
+                        future, fname = pending.popleft()
+
+                        yield future.result(), fname, fname.split("/")[-1]
+
+                while pending:
+                    future, fname = pending.popleft()
+
+                    yield future.result(), fname, fname.split("/")[-1]
+
+            self.log_writer.log(
+                f"Streamed csv files from {folder_name} folder from {container} container",
+                log_file,
+            )
+
+            self.log_writer.start_log("exit", self.class_name, method_name, log_file)
+
+        except Exception as e:
+            self.log_writer.exception_log(e, self.class_name, method_name, log_file)
+
     def upload_df_as_csv(
         self, dataframe, local_fname, container_fname, container, log_file
     ):
         """
         Method Name :   upload_df_as_csv
-        Description :   This method uploads the dataframe as csv file to blob container
+        Description :   This method uploads the dataframe as csv file to blob container. The dataframe is serialized in memory,
+                        and large dataframes are streamed in chunks of rows, so no local copy is written. The local_fname
+                        parameter is kept for the existing callers and is not used
         
-        Output      :   The dataframe is uploaded to blob container as a csv file
+        Output      :   The dataframe is uploaded to blob container as a csv file, replacing the existing file
         On Failure  :   Write an exception log and then raise an exception
         
         Version     :   1.2
@@ -426,13 +626,488 @@ class Blob_Operation:
         self.log_writer.start_log("start", self.class_name, method_name, log_file)
 
         try:
-            dataframe.to_csv(self.files[local_fname], index=None, header=True)
+            client = self.get_container_client(container, log_file)
+
+            chunk_rows = self.upload_config["chunk_rows"]
+
+            if len(dataframe) > chunk_rows:
+                data = (
+                    dataframe.iloc[i : i + chunk_rows]
+                    .to_csv(index=None, header=i == 0)
+                    .encode()
+                    for i in range(0, len(dataframe), chunk_rows)
+                )
+
+            else:
+                data = dataframe.to_csv(index=None, header=True).encode()
+
+            client.upload_blob(
+                name=self.files[container_fname], data=data, overwrite=True
+            )
+
+            self.log_writer.log(
+                f"Uploaded dataframe to {container} container with name as {container_fname} file",
+                log_file,
+            )
+
+            self.log_writer.start_log("exit", self.class_name, method_name, log_file)
+
+        except Exception as e:
+            self.log_writer.exception_log(e, self.class_name, method_name, log_file)
+
+    def write_frame(self, dataframe, fname, container, log_file):
+        """
+        Method Name :   write_frame
+        Description :   This method uploads the dataframe to blob container in the format set for the feature store.
+                        Parquet files are compressed with the codec set for the feature store
+
+        Output      :   The dataframe is uploaded to blob container, replacing the existing file
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.write_frame.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, log_file)
+
+        try:
+            if isinstance(dataframe, Series):
+                dataframe = dataframe.to_frame()
+
+            if self.frame_config["format"] == "parquet":
+                frame_fname = self.get_frame_fname(self.files[fname], log_file)
+
+                client = self.get_container_client(container, log_file)
+
+                buffer = BytesIO()
+
+                dataframe.to_parquet(
+                    buffer, index=False, compression=self.frame_config["compression"]
+                )
+
+                client.upload_blob(
+                    name=frame_fname, data=buffer.getvalue(), overwrite=True
+                )
+
+            else:
+                self.upload_df_as_csv(dataframe, fname, fname, container, log_file)
+
+            self.log_writer.log(
+                f"Uploaded dataframe to {container} container as {fname} in {self.frame_config['format']} format",
+                log_file,
+            )
+
+            self.log_writer.start_log("exit", self.class_name, method_name, log_file)
+
+        except Exception as e:
+            self.log_writer.exception_log(e, self.class_name, method_name, log_file)
+
+    def get_part_fname(self, fname, part, log_file):
+        """
+        Method Name :   get_part_fname
+        Description :   This method gets the file name of the numbered partition of the feature store file, partitions
+                        hold the rows exported after the file was last written in full
+
+        Output      :   The file name of the partition is returned
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.get_part_fname.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, log_file)
+
+        try:
+            part_fname = self.files[fname].replace(".csv", f"-part-{part:05d}.csv")
+
+            self.log_writer.log(
+                f"Got {part_fname} as partition {part} of {fname}", log_file
+            )
+
+            self.log_writer.start_log("exit", self.class_name, method_name, log_file)
+
+            return part_fname
+
+        except Exception as e:
+            self.log_writer.exception_log(e, self.class_name, method_name, log_file)
+
+    def get_part_fnames(self, fname, container, log_file):
+        """
+        Method Name :   get_part_fnames
+        Description :   This method gets the file names of the partitions of the feature store file present in container,
+                        in the order of the partition number
+
+        Output      :   A sorted list of file names of the partitions is returned
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.get_part_fnames.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, log_file)
+
+        try:
+            client = self.get_container_client(container, log_file)
+
+            prefix = self.files[fname].replace(".csv", "-part-")
+
+            ext = self.get_frame_fname(".csv", log_file)
+
+            part_fnames = sorted(
+                f.name
+                for f in client.list_blobs(name_starts_with=prefix)
+                if f.name.endswith(ext)
+            )
+
+            self.log_writer.log(
+                f"Got {len(part_fnames)} partitions of {fname} from {container} container",
+                log_file,
+            )
+
+            self.log_writer.start_log("exit", self.class_name, method_name, log_file)
+
+            return part_fnames
+
+        except Exception as e:
+            self.log_writer.exception_log(e, self.class_name, method_name, log_file)
+
+    def iter_frame_blob(self, frame_fname, container, log_file):
+        """
+        Method Name :   iter_frame_blob
+        Description :   This method reads the feature store file from container as dataframes of chunk_rows rows, parquet
+                        files are read by record batches and csv files by chunks of rows
+
+        Output      :   A generator of dataframes of the file is returned
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.iter_frame_blob.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, log_file)
+
+        try:
+            client = self.get_container_client(container, log_file)
+
+            content = BytesIO(client.download_blob(blob=frame_fname).readall())
+
+            chunk_rows = self.frame_config["chunk_rows"]
+
+            if self.frame_config["format"] == "parquet":
+                for batch in ParquetFile(content).iter_batches(batch_size=chunk_rows):
+                    yield batch.to_pandas()
+
+            else:
+                yield from read_csv(content, chunksize=chunk_rows)
+
+            self.log_writer.log(
+                f"Streamed {frame_fname} file from {container} container", log_file
+            )
+
+            self.log_writer.start_log("exit", self.class_name, method_name, log_file)
+
+        except Exception as e:
+            self.log_writer.exception_log(e, self.class_name, method_name, log_file)
+
+    def delete_frame_parts(self, fname, container, log_file):
+        """
+        Method Name :   delete_frame_parts
+        Description :   This method deletes the partitions of the feature store file from container in a single batch
+
+        Output      :   The partitions of the feature store file are deleted from container
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.delete_frame_parts.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, log_file)
+
+        try:
+            part_fnames = self.get_part_fnames(fname, container, log_file)
+
+            if part_fnames:
+                client = self.get_container_client(container, log_file)
+
+                client.delete_blobs(*part_fnames)
 
             self.log_writer.log(
-                f"Created a local copy of dataframe with name {local_fname}", log_file
+                f"Deleted {len(part_fnames)} partitions of {fname} from {container} container",
+                log_file,
             )
 
-            self.upload_file(local_fname, container_fname, container, log_file)
+            self.log_writer.start_log("exit", self.class_name, method_name, log_file)
+
+        except Exception as e:
+            self.log_writer.exception_log(e, self.class_name, method_name, log_file)
+
+    def get_frame_parts_schema(self, frame_fnames, container, log_file):
+        """
+        Method Name :   get_frame_parts_schema
+        Description :   This method gets a common schema for parquet files written at different times, a column is
+                        float64 when it is numeric in every file that has it and a string otherwise, so that files
+                        with drifted column types can be written to one file
+
+        Output      :   The common arrow schema of the files is returned
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.get_frame_parts_schema.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, log_file)
+
+        try:
+            client = self.get_container_client(container, log_file)
+
+            numeric = {}
+
+            for f in frame_fnames:
+                content = BytesIO(client.download_blob(blob=f).readall())
+
+                for field in ParquetFile(content).schema_arrow:
+                    is_numeric = (
+                        is_integer(field.type)
+                        or is_floating(field.type)
+                        or is_boolean(field.type)
+                        or is_null(field.type)
+                    )
+
+                    numeric[field.name] = numeric.get(field.name, True) and is_numeric
+
+            schema = arrow_schema(
+                [
+                    (col, float64() if is_numeric else string())
+                    for col, is_numeric in numeric.items()
+                ]
+            )
+
+            self.log_writer.log(
+                f"Got common schema of {len(frame_fnames)} files from {container} container",
+                log_file,
+            )
+
+            self.log_writer.start_log("exit", self.class_name, method_name, log_file)
+
+            return schema
+
+        except Exception as e:
+            self.log_writer.exception_log(e, self.class_name, method_name, log_file)
+
+    def compact_frame_parts(self, fname, container, log_file):
+        """
+        Method Name :   compact_frame_parts
+        Description :   This method compacts the feature store file and its partitions into a single file, the file and
+                        the partitions are streamed in chunks into the new file, and the partitions are deleted after it
+                        is committed. Parquet files are written with the common schema of the file and the partitions,
+                        so partitions whose column types drifted can still be compacted
+
+        Output      :   The number of partitions compacted into the feature store file is returned
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.compact_frame_parts.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, log_file)
+
+        try:
+            part_fnames = self.get_part_fnames(fname, container, log_file)
+
+            if part_fnames:
+                frame_fname = self.get_frame_fname(self.files[fname], log_file)
+
+                client = self.get_container_client(container, log_file)
+
+                fnames = (
+                    [frame_fname]
+                    if client.get_blob_client(frame_fname).exists()
+                    else []
+                )
+
+                frames = (
+                    df
+                    for f in fnames + part_fnames
+                    for df in self.iter_frame_blob(f, container, log_file)
+                )
+
+                schema = (
+                    self.get_frame_parts_schema(
+                        fnames + part_fnames, container, log_file
+                    )
+                    if self.frame_config["format"] == "parquet"
+                    else None
+                )
+
+                self.write_frame_parts(
+                    frames, fname, container, log_file, schema=schema
+                )
+
+                client.delete_blobs(*part_fnames)
+
+            self.log_writer.log(
+                f"Compacted {len(part_fnames)} partitions into {fname} file", log_file
+            )
+
+            self.log_writer.start_log("exit", self.class_name, method_name, log_file)
+
+            return len(part_fnames)
+
+        except Exception as e:
+            self.log_writer.exception_log(e, self.class_name, method_name, log_file)
+
+    def normalize_frame(self, dataframe, log_file, schema=None):
+        """
+        Method Name :   normalize_frame
+        Description :   This method normalizes the column types of a dataframe written to a parquet file in parts, so
+                        that the types do not depend on the values in the part. Numeric columns, and object columns
+                        holding only numbers or missing values, are converted to float64 and the other columns to
+                        strings. When the schema of the file is given the columns follow the types in the schema
+
+        Output      :   The dataframe with normalized column types and its arrow schema are returned
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.normalize_frame.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, log_file)
+
+        try:
+            columns = {}
+
+            for col in dataframe.columns:
+                values = dataframe[col]
+
+                if is_numeric_dtype(values):
+                    numeric = values
+
+                elif values.dtype == object:
+                    numeric = to_numeric(values, errors="coerce")
+
+                    if numeric.notna().sum() != values.notna().sum():
+                        numeric = None
+
+                else:
+                    numeric = None
+
+                field_type = None if schema is None else schema.field(col).type
+
+                if numeric is not None and field_type in (None, float64()):
+                    columns[col] = numeric.astype("float64")
+
+                elif field_type == float64():
+                    raise ValueError(
+                        f"Column {col} has non numeric values but is float64 in the file schema"
+                    )
+
+                else:
+                    columns[col] = values.astype(str).where(values.notna())
+
+            df = DataFrame(columns, index=dataframe.index)
+
+            if schema is None:
+                schema = arrow_schema(
+                    [
+                        (col, float64() if df[col].dtype == "float64" else string())
+                        for col in df.columns
+                    ]
+                )
+
+            self.log_writer.log(
+                f"Normalized {len(df.columns)} column types of dataframe", log_file
+            )
+
+            self.log_writer.start_log("exit", self.class_name, method_name, log_file)
+
+            return df, schema
+
+        except Exception as e:
+            self.log_writer.exception_log(e, self.class_name, method_name, log_file)
+
+    def write_frame_parts(
+        self, frames, fname, container, log_file, part=None, schema=None
+    ):
+        """
+        Method Name :   write_frame_parts
+        Description :   This method uploads an iterable of dataframes to blob container as a single file in the format
+                        set for the feature store. Each dataframe is written as a parquet row group or as csv rows and
+                        staged as blocks of the blob as it arrives, so only one dataframe is held in memory. Parquet
+                        column types are normalized so that every row group has the same schema, which is taken from
+                        schema when it is given. When part is given the dataframes are written as that partition of
+                        the file
+
+        Output      :   The dataframes are uploaded to blob container as one file, replacing the existing file
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.write_frame_parts.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, log_file)
+
+        try:
+            base_fname = (
+                self.files[fname]
+                if part is None
+                else self.get_part_fname(fname, part, log_file)
+            )
+
+            frame_fname = self.get_frame_fname(base_fname, log_file)
+
+            client = self.get_container_client(container, log_file).get_blob_client(
+                frame_fname
+            )
+
+            sink = Block_Sink(client, self.frame_config["block_bytes"])
+
+            writer, columns, rows = None, None, 0
+
+            for df in frames:
+                if columns is None:
+                    columns = df.columns if schema is None else schema.names
+
+                df = df.reindex(columns=columns)
+
+                if self.frame_config["format"] == "parquet":
+                    df, schema = self.normalize_frame(df, log_file, schema=schema)
+
+                    table = Table.from_pandas(df, schema=schema, preserve_index=False)
+
+                    if writer is None:
+                        writer = ParquetWriter(
+                            sink, schema, compression=self.frame_config["compression"]
+                        )
+
+                    writer.write_table(table)
+
+                else:
+                    sink.write(df.to_csv(index=None, header=rows == 0).encode())
+
+                rows += len(df)
+
+            if columns is None and part is None:
+                self.write_frame(DataFrame(), fname, container, log_file)
+
+            elif columns is not None:
+                if writer is not None:
+                    writer.close()
+
+                sink.commit()
+
+            self.log_writer.log(
+                f"Uploaded {rows} rows to {container} container as {frame_fname} in {len(sink.block_ids)} blocks",
+                log_file,
+            )
 
             self.log_writer.start_log("exit", self.class_name, method_name, log_file)
 
@@ -468,7 +1143,7 @@ class Blob_Operation:
 
                 dest_f = folder + "/" + f
 
-                self.upload_file(local_f, dest_f, container, log_file)
+                self.upload_file(local_f, dest_f, container, log_file, delete=delete)
 
             if delete is True:
                 rmtree(folder)
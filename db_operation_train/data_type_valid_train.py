@@ -1,6 +1,11 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
 from blob_operations import Blob_Operation
 from mongo_db_operations import MongoDB_Operation
 from utils.logger import App_Logger
+from utils.main_utils import Main_Utils
+from utils.read_params import read_params
 
 
 class DB_Operation_Train:
@@ -14,16 +19,74 @@ class DB_Operation_Train:
     def __init__(self):
         self.class_name = self.__class__.__name__
 
+        self.config = read_params()
+
+        self.insert_workers = self.config["mongodb_insert"]["max_workers"]
+
+        self.export_config = self.config["mongodb_export"]
+
         self.blob = Blob_Operation()
 
         self.mongo = MongoDB_Operation()
 
+        self.utils = Main_Utils()
+
         self.log_writer = App_Logger()
 
-    def insert_good_data_as_record(self, good_data_db_name, good_data_collection_name):
+    def ingest_good_data_file(
+        self,
+        data_frame,
+        fname,
+        etag,
+        good_data_db_name,
+        good_data_collection_name,
+        manifest_collection_name,
+    ):
+        """
+        Method Name :   ingest_good_data_file
+        Description :   This method upserts the good data file in MongoDB and then records it in the ingestion manifest.
+                        Quotes are added to the dataframe before it is upserted, which leaves files already transformed
+                        by the data transform stage as they are and transforms them when that stage is skipped
+
+        Output      :   The good data file is upserted in MongoDB and recorded in the ingestion manifest
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.ingest_good_data_file.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, "db_insert")
+
+        try:
+            data_frame = self.utils.quote_string_columns(data_frame, "db_insert")
+
+            self.mongo.insert_dataframe_as_record(
+                data_frame, good_data_db_name, good_data_collection_name, "db_insert"
+            )
+
+            self.mongo.add_ingested_file(
+                fname,
+                etag,
+                len(data_frame),
+                good_data_db_name,
+                manifest_collection_name,
+                "db_insert",
+            )
+
+            self.log_writer.start_log("exit", self.class_name, method_name, "db_insert")
+
+        except Exception as e:
+            self.log_writer.exception_log(e, self.class_name, method_name, "db_insert")
+
+    def insert_good_data_as_record(
+        self, good_data_db_name, good_data_collection_name, manifest_collection_name
+    ):
         """
         Method Name :   insert_good_data_as_record
-        Description :   This method inserts the good data in MongoDB as collection
+        Description :   This method inserts the good data in MongoDB as collection, the files are inserted
+                        concurrently over the shared mongo client with at most max_workers files in flight.
+                        Files recorded in the ingestion manifest with an unchanged etag are skipped
 
         Output      :   A MongoDB collection is created with good data present in it
         On Failure  :   Write an exception log and then raise an exception
@@ -36,30 +99,116 @@ class DB_Operation_Train:
         self.log_writer.start_log("start", self.class_name, method_name, "db_insert")
 
         try:
-            lst = self.blob.read_csv_from_folder(
+            etags = self.blob.get_file_etags(
                 "train_good_data", "train_data", "db_insert"
             )
 
-            for _, f in enumerate(lst):
-                df = f[0]
+            ingested = self.mongo.get_ingested_files(
+                good_data_db_name, manifest_collection_name, "db_insert"
+            )
 
-                self.mongo.insert_dataframe_as_record(
-                    df, good_data_db_name, good_data_collection_name, "db_insert"
-                )
+            new_fnames = [f for f, etag in etags.items() if ingested.get(f) != etag]
 
-                self.log_writer.log(
-                    "Inserted dataframe as collection record in mongodb", "db_insert"
-                )
+            self.log_writer.summary(
+                f"Ingesting {len(new_fnames)} new files, skipping {len(etags) - len(new_fnames)} already ingested files",
+                "db_insert",
+            )
+
+            lst = self.blob.iter_csv_from_folder(
+                "train_good_data", "train_data", "db_insert", fnames=new_fnames
+            )
+
+            with ThreadPoolExecutor(max_workers=self.insert_workers) as executor:
+                pending = deque()
+
+                for f in lst:
+                    pending.append(
+                        executor.submit(
+                            self.ingest_good_data_file,
+                            f[0],
+                            f[1],
+                            etags[f[1]],
+                            good_data_db_name,
+                            good_data_collection_name,
+                            manifest_collection_name,
+                        )
+                    )
+
+                    if len(pending) >= self.insert_workers:
+                        pending.popleft().result()
+
+                for future in pending:
+                    future.result()
+
+            self.log_writer.log(
+                "Inserted dataframes as collection record in mongodb", "db_insert"
+            )
 
             self.log_writer.start_log("exit", self.class_name, method_name, "db_insert")
 
         except Exception as e:
             self.log_writer.exception_log(e, self.class_name, method_name, "db_insert")
 
-    def export_collection_to_csv(self, good_data_db_name, good_data_collection_name):
+    def compact_feature_store(
+        self, good_data_db_name, good_data_collection_name, watermark_collection_name
+    ):
+        """
+        Method Name :   compact_feature_store
+        Description :   This method compacts the partitions of the exported file in the feature store into the file
+                        and resets the partition count of the export watermark
+
+        Output      :   The exported file in the feature store holds all the exported rows in a single file
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.compact_feature_store.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, "export_csv")
+
+        try:
+            watermark = self.mongo.get_export_watermark(
+                good_data_db_name,
+                watermark_collection_name,
+                good_data_collection_name,
+                "export_csv",
+            )
+
+            num_parts = self.blob.compact_frame_parts(
+                "train_export", "feature_store", "export_csv"
+            )
+
+            if watermark is not None:
+                self.mongo.set_export_watermark(
+                    watermark["last_id"],
+                    0,
+                    good_data_db_name,
+                    watermark_collection_name,
+                    good_data_collection_name,
+                    "export_csv",
+                )
+
+            self.log_writer.summary(
+                f"Compacted {num_parts} partitions into the exported file", "export_csv"
+            )
+
+            self.log_writer.start_log(
+                "exit", self.class_name, method_name, "export_csv"
+            )
+
+        except Exception as e:
+            self.log_writer.exception_log(e, self.class_name, method_name, "export_csv")
+
+    def export_collection_to_csv(
+        self, good_data_db_name, good_data_collection_name, watermark_collection_name
+    ):
         """
         Method Name :   export_collection_to_csv
-        Description :   This method inserts the good data in MongoDB as collection
+        Description :   This method exports the good data collection from MongoDB to the feature store, the
+                        collection is streamed in chunks and written to blob in parts so memory stays bounded.
+                        In incremental mode only the documents after the export watermark are written, as a new
+                        partition of the exported file, and the partitions are compacted once there are compact_after
 
         Output      :   A csv file stored in input files container, containing good data which was stored in MongoDB
         On Failure  :   Write an exception log and then raise an exception
@@ -72,15 +221,94 @@ class DB_Operation_Train:
         self.log_writer.start_log("start", self.class_name, method_name, "export_csv")
 
         try:
-            df = self.mongo.get_collection_as_dataframe(
+            max_id = self.mongo.get_max_object_id(
                 good_data_db_name, good_data_collection_name, "export_csv"
             )
 
-            self.blob.upload_df_as_csv(
-                df, "train_export", "train_export", "feature_store", "export_csv"
+            watermark = self.mongo.get_export_watermark(
+                good_data_db_name,
+                watermark_collection_name,
+                good_data_collection_name,
+                "export_csv",
             )
 
-            self.log_writer.log("Exported dataframe to csv file", "export_csv")
+            incremental = (
+                self.export_config["mode"] == "incremental"
+                and watermark is not None
+                and watermark["last_id"] is not None
+            )
+
+            if incremental and (max_id is None or max_id <= watermark["last_id"]):
+                self.log_writer.summary(
+                    "No new documents after the export watermark", "export_csv"
+                )
+
+            elif incremental:
+                frames = self.mongo.iter_collection_as_dataframe(
+                    good_data_db_name,
+                    good_data_collection_name,
+                    "export_csv",
+                    after_id=watermark["last_id"],
+                    upto_id=max_id,
+                )
+
+                self.blob.write_frame_parts(
+                    frames,
+                    "train_export",
+                    "feature_store",
+                    "export_csv",
+                    part=watermark["parts"],
+                )
+
+                self.mongo.set_export_watermark(
+                    max_id,
+                    watermark["parts"] + 1,
+                    good_data_db_name,
+                    watermark_collection_name,
+                    good_data_collection_name,
+                    "export_csv",
+                )
+
+                self.log_writer.summary(
+                    f"Exported documents after {watermark['last_id']} as partition {watermark['parts']}",
+                    "export_csv",
+                )
+
+                if watermark["parts"] + 1 >= self.export_config["compact_after"]:
+                    self.compact_feature_store(
+                        good_data_db_name,
+                        good_data_collection_name,
+                        watermark_collection_name,
+                    )
+
+            else:
+                frames = self.mongo.iter_collection_as_dataframe(
+                    good_data_db_name,
+                    good_data_collection_name,
+                    "export_csv",
+                    upto_id=max_id,
+                )
+
+                self.blob.write_frame_parts(
+                    frames, "train_export", "feature_store", "export_csv"
+                )
+
+                self.blob.delete_frame_parts(
+                    "train_export", "feature_store", "export_csv"
+                )
+
+                self.mongo.set_export_watermark(
+                    max_id,
+                    0,
+                    good_data_db_name,
+                    watermark_collection_name,
+                    good_data_collection_name,
+                    "export_csv",
+                )
+
+                self.log_writer.summary(
+                    "Exported the collection in full to feature store", "export_csv"
+                )
 
             self.log_writer.start_log(
                 "exit", self.class_name, method_name, "export_csv"
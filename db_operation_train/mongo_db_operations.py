@@ -1,13 +1,56 @@
-from json import loads
+from datetime import datetime
 from os import environ
+from threading import Lock
 
-from pandas import DataFrame
-from pymongo import MongoClient
+from pandas import DataFrame, concat
+from pandas.util import hash_pandas_object
+from pymongo import MongoClient, UpdateOne
+from pymongo.errors import BulkWriteError
 
-from utils.logger import App_Logger
+from utils.local_mongo import Local_Mongo_Client, Local_Update_One
+from utils.logger import App_Logger, trace_spans
 from utils.read_params import read_params
 
+_mongo_lock = Lock()
 
+_mongo_clients = {}
+
+
+def get_pooled_mongo_client(db_url, max_pool_size, backend="mongodb"):
+    """
+    Method Name :   get_pooled_mongo_client
+    Description :   This method gets the process wide mongo client for the db url, the client is created once and its
+                    connection pool is shared by every MongoDB_Operation and by the threads inserting records
+                    With the local backend the db url is the path of the sqlite file of the local stand in client
+
+    Output      :   The pooled mongo client for the db url is returned
+    On Failure  :   Write an exception log and then raise an exception
+
+    Version     :   1.2
+    Revisions   :   moved setup to cloud
+    """
+    method_name = get_pooled_mongo_client.__name__
+
+    try:
+        with _mongo_lock:
+            if db_url not in _mongo_clients:
+                if backend == "local":
+                    _mongo_clients[db_url] = Local_Mongo_Client(db_url)
+
+                else:
+                    _mongo_clients[db_url] = MongoClient(
+                        db_url, maxPoolSize=max_pool_size
+                    )
+
+            return _mongo_clients[db_url]
+
+    except Exception as e:
+        raise Exception(
+            f"Exception occured in {__file__}, Method : {method_name}, Error : {str(e)}"
+        )
+
+
+@trace_spans
 class MongoDB_Operation:
     """
     Description :   This method is used for all mongodb operations
@@ -23,9 +66,29 @@ class MongoDB_Operation:
 
         self.mongo_config = self.config["mongodb"]
 
-        self.DB_URL = environ["MONGODB_URL"]
+        self.insert_config = self.config["mongodb_insert"]
+
+        self.export_config = self.config["mongodb_export"]
 
-        self.client = MongoClient(self.DB_URL)
+        self.indexed_collections = set()
+
+        self.backend_config = self.config["mongodb_backend"]
+
+        if self.backend_config["type"] == "local":
+            self.DB_URL = self.backend_config["local_path"]
+
+        else:
+            self.DB_URL = environ["MONGODB_URL"]
+
+        self.update_one = (
+            Local_Update_One if self.backend_config["type"] == "local" else UpdateOne
+        )
+
+        self.client = get_pooled_mongo_client(
+            self.DB_URL,
+            self.insert_config["max_pool_size"],
+            self.backend_config["type"],
+        )
 
         self.log_writer = App_Logger()
 
@@ -85,6 +148,317 @@ class MongoDB_Operation:
         except Exception as e:
             self.log_writer.exception_log(e, self.class_name, method_name, log_file)
 
+    def get_max_object_id(self, db_name, collection_name, log_file):
+        """
+        Method Name :   get_max_object_id
+        Description :   This method gets the largest _id of the deduplicated documents of the selected collection, it is
+                        used as the upper bound of an export and as the next export watermark
+
+        Output      :   The largest ObjectId of the collection is returned, None if the collection is empty
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.get_max_object_id.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, log_file)
+
+        try:
+            database = self.get_database(db_name, log_file)
+
+            collection = self.get_collection(database, collection_name, log_file)
+
+            doc = collection.find_one(
+                {"row_hash": {"$exists": True}}, {"_id": 1}, sort=[("_id", -1)]
+            )
+
+            max_id = None if doc is None else doc["_id"]
+
+            self.log_writer.log(
+                f"Got {max_id} as the largest id of {collection_name} collection",
+                log_file,
+            )
+
+            self.log_writer.start_log("exit", self.class_name, method_name, log_file)
+
+            return max_id
+
+        except Exception as e:
+            self.log_writer.exception_log(e, self.class_name, method_name, log_file)
+
+    def get_export_watermark(
+        self, db_name, watermark_collection_name, collection_name, log_file
+    ):
+        """
+        Method Name :   get_export_watermark
+        Description :   This method gets the export watermark of the selected collection, the watermark holds the
+                        largest _id exported so far and the number of partitions written since the last full export
+
+        Output      :   The watermark document is returned, None if the collection was never exported
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.get_export_watermark.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, log_file)
+
+        try:
+            database = self.get_database(db_name, log_file)
+
+            watermarks = self.get_collection(
+                database, watermark_collection_name, log_file
+            )
+
+            watermark = watermarks.find_one({"_id": self.mongo_config[collection_name]})
+
+            self.log_writer.log(
+                f"Got export watermark of {collection_name} collection as {watermark}",
+                log_file,
+            )
+
+            self.log_writer.start_log("exit", self.class_name, method_name, log_file)
+
+            return watermark
+
+        except Exception as e:
+            self.log_writer.exception_log(e, self.class_name, method_name, log_file)
+
+    def set_export_watermark(
+        self,
+        last_id,
+        parts,
+        db_name,
+        watermark_collection_name,
+        collection_name,
+        log_file,
+    ):
+        """
+        Method Name :   set_export_watermark
+        Description :   This method sets the export watermark of the selected collection to the largest _id exported
+                        and the number of partitions written since the last full export
+
+        Output      :   The export watermark of the collection is updated
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.set_export_watermark.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, log_file)
+
+        try:
+            database = self.get_database(db_name, log_file)
+
+            watermarks = self.get_collection(
+                database, watermark_collection_name, log_file
+            )
+
+            watermarks.update_one(
+                {"_id": self.mongo_config[collection_name]},
+                {
+                    "$set": {
+                        "last_id": last_id,
+                        "parts": parts,
+                        "exported_at": datetime.utcnow(),
+                    }
+                },
+                upsert=True,
+            )
+
+            self.log_writer.log(
+                f"Set export watermark of {collection_name} collection to {last_id} with {parts} partitions",
+                log_file,
+            )
+
+            self.log_writer.start_log("exit", self.class_name, method_name, log_file)
+
+        except Exception as e:
+            self.log_writer.exception_log(e, self.class_name, method_name, log_file)
+
+    def iter_collection_as_dataframe(
+        self, db_name, collection_name, log_file, after_id=None, upto_id=None
+    ):
+        """
+        Method Name :   iter_collection_as_dataframe
+        Description :   This method streams the deduplicated documents of the selected collection as dataframes of
+                        chunk_rows rows, the _id and row_hash fields are projected out by the server and the cursor
+                        fetches batch_size documents at a time. after_id and upto_id limit the export to the documents
+                        with _id in that range
+
+        Output      :   A generator of dataframes of the selected db_name and collection_name is returned
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.iter_collection_as_dataframe.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, log_file)
+
+        try:
+            database = self.get_database(db_name, log_file)
+
+            collection = self.get_collection(database, collection_name, log_file)
+
+            query = {"row_hash": {"$exists": True}}
+
+            id_range = {
+                op: object_id
+                for op, object_id in (("$gt", after_id), ("$lte", upto_id))
+                if object_id is not None
+            }
+
+            if id_range:
+                query["_id"] = id_range
+
+            cursor = collection.find(
+                query,
+                {"_id": 0, "row_hash": 0},
+                batch_size=self.export_config["batch_size"],
+            )
+
+            chunk_rows, docs, num_chunks = self.export_config["chunk_rows"], [], 0
+
+            for doc in cursor:
+                docs.append(doc)
+
+                if len(docs) == chunk_rows:
+                    yield DataFrame(docs)
+
+                    docs, num_chunks = [], num_chunks + 1
+
+            if docs:
+                yield DataFrame(docs)
+
+                num_chunks += 1
+
+            self.log_writer.log(
+                f"Streamed {collection_name} collection as {num_chunks} dataframes",
+                log_file,
+            )
+
+            self.log_writer.start_log("exit", self.class_name, method_name, log_file)
+
+        except Exception as e:
+            self.log_writer.exception_log(e, self.class_name, method_name, log_file)
+
+    def create_row_hash_index(self, collection, log_file):
+        """
+        Method Name :   create_row_hash_index
+        Description :   This method creates the unique index on the row_hash field of the collection, once per
+                        collection in the process. Documents inserted before the row hash was added are left out of the index
+
+        Output      :   The unique row_hash index is created on the collection
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.create_row_hash_index.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, log_file)
+
+        try:
+            if collection.full_name not in self.indexed_collections:
+                collection.create_index(
+                    "row_hash",
+                    unique=True,
+                    partialFilterExpression={"row_hash": {"$exists": True}},
+                )
+
+                self.indexed_collections.add(collection.full_name)
+
+            self.log_writer.log(
+                f"Created unique row_hash index on {collection.full_name} collection",
+                log_file,
+            )
+
+            self.log_writer.start_log("exit", self.class_name, method_name, log_file)
+
+        except Exception as e:
+            self.log_writer.exception_log(e, self.class_name, method_name, log_file)
+
+    def get_ingested_files(self, db_name, manifest_collection_name, log_file):
+        """
+        Method Name :   get_ingested_files
+        Description :   This method gets the files recorded in the ingestion manifest collection
+
+        Output      :   A dict of file name and etag of the ingested files is returned
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.get_ingested_files.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, log_file)
+
+        try:
+            database = self.get_database(db_name, log_file)
+
+            manifest = self.get_collection(database, manifest_collection_name, log_file)
+
+            ingested = {f["_id"]: f["etag"] for f in manifest.find({}, {"etag": 1})}
+
+            self.log_writer.log(
+                f"Got {len(ingested)} ingested files from {manifest_collection_name} collection",
+                log_file,
+            )
+
+            self.log_writer.start_log("exit", self.class_name, method_name, log_file)
+
+            return ingested
+
+        except Exception as e:
+            self.log_writer.exception_log(e, self.class_name, method_name, log_file)
+
+    def add_ingested_file(
+        self, fname, etag, num_rows, db_name, manifest_collection_name, log_file
+    ):
+        """
+        Method Name :   add_ingested_file
+        Description :   This method records the file with its etag and number of rows in the ingestion manifest collection
+
+        Output      :   The file is recorded in the ingestion manifest collection
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.add_ingested_file.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, log_file)
+
+        try:
+            database = self.get_database(db_name, log_file)
+
+            manifest = self.get_collection(database, manifest_collection_name, log_file)
+
+            manifest.update_one(
+                {"_id": fname},
+                {
+                    "$set": {
+                        "etag": etag,
+                        "rows": num_rows,
+                        "ingested_at": datetime.utcnow(),
+                    }
+                },
+                upsert=True,
+            )
+
+            self.log_writer.log(
+                f"Recorded {fname} in {manifest_collection_name} collection", log_file
+            )
+
+            self.log_writer.start_log("exit", self.class_name, method_name, log_file)
+
+        except Exception as e:
+            self.log_writer.exception_log(e, self.class_name, method_name, log_file)
+
     def get_collection_as_dataframe(self, db_name, collection_name, log_file):
         """
         Method Name :   get_collection_as_dataframe
@@ -101,14 +475,11 @@ class MongoDB_Operation:
         self.log_writer.start_log("start", self.class_name, method_name, log_file)
 
         try:
-            database = self.get_database(db_name, log_file)
-
-            collection = self.get_collection(database, collection_name, log_file)
-
-            df = DataFrame(list(collection.find()))
+            frames = list(
+                self.iter_collection_as_dataframe(db_name, collection_name, log_file)
+            )
 
-            if "_id" in df.columns.to_list():
-                df = df.drop(columns=["_id"], axis=1)
+            df = concat(frames, ignore_index=True) if frames else DataFrame()
 
             self.log_writer.log("Converted collection to dataframe", log_file)
 
@@ -124,7 +495,9 @@ class MongoDB_Operation:
     ):
         """
         Method Name :   insert_dataframe_as_record
-        Description :   This method inserts the dataframe as record in database collection
+        Description :   This method inserts the dataframe as record in database collection. Each row is keyed by
+                        the hash of its content and upserted in chunks of chunk_size rows with an unordered bulk write,
+                        so rows already present in the collection are not inserted again
 
         Output      :   The dataframe is inserted in database collection
         On Failure  :   Write an exception log and then raise an exception
@@ -137,19 +510,45 @@ class MongoDB_Operation:
         self.log_writer.start_log("start", self.class_name, method_name, log_file)
 
         try:
-            records = loads(data_frame.T.to_json()).values()
-
-            self.log_writer.log(f"Converted dataframe to json records", log_file)
-
             database = self.get_database(db_name, log_file)
 
             collection = self.get_collection(database, collection_name, log_file)
 
-            self.log_writer.log("Inserting records to MongoDB", log_file)
+            self.create_row_hash_index(collection, log_file)
+
+            chunk_size = self.insert_config["chunk_size"]
+
+            row_hashes = [
+                format(h, "016x") for h in hash_pandas_object(data_frame, index=False)
+            ]
+
+            self.log_writer.log("Upserting records to MongoDB", log_file)
+
+            num_inserted = 0
 
-            collection.insert_many(records)
+            for i in range(0, len(data_frame), chunk_size):
+                records = data_frame.iloc[i : i + chunk_size].to_dict("records")
 
-            self.log_writer.log("Inserted records to MongoDB", log_file)
+                ops = [
+                    self.update_one({"row_hash": h}, {"$setOnInsert": r}, upsert=True)
+                    for h, r in zip(row_hashes[i : i + chunk_size], records)
+                ]
+
+                try:
+                    num_inserted += collection.bulk_write(
+                        ops, ordered=False
+                    ).upserted_count
+
+                except BulkWriteError as bwe:
+                    if any(err["code"] != 11000 for err in bwe.details["writeErrors"]):
+                        raise bwe
+
+                    num_inserted += bwe.details["nUpserted"]
+
+            self.log_writer.log(
+                f"Upserted {len(data_frame)} records to MongoDB, {num_inserted} were new",
+                log_file,
+            )
 
             self.log_writer.start_log("exit", self.class_name, method_name, log_file)
 
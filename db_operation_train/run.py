@@ -1,5 +1,5 @@
 from data_type_valid_train import DB_Operation_Train
-from utils.logger import App_Logger
+from utils.logger import App_Logger, print_span_summary
 from utils.main_utils import Main_Utils
 
 
@@ -36,11 +36,15 @@ class Run:
         try:
             self.log_writer.log("Data type validation operation started !!", "db_main")
 
-            self.db_operation.insert_good_data_as_record("db_name", "collection_name")
+            self.db_operation.insert_good_data_as_record(
+                "db_name", "collection_name", "manifest_collection_name"
+            )
 
-            self.db_operation.export_collection_to_csv("db_name", "collection_name")
+            self.db_operation.export_collection_to_csv(
+                "db_name", "collection_name", "watermark_collection_name"
+            )
 
-            self.log_writer.log(
+            self.log_writer.summary(
                 "Data type validation Operation completed !!", "db_main"
             )
 
@@ -60,6 +64,10 @@ if __name__ == "__main__":
         raise e
 
     finally:
-        utils = Main_Utils()
+        try:
+            utils = Main_Utils()
+
+            utils.upload_logs()
 
-        utils.upload_logs()
+        finally:
+            print_span_summary()
@@ -1,13 +1,14 @@
+from json import loads
 from os import environ, listdir
 from os.path import join
 from shutil import rmtree
 
-from azure.storage.blob import BlobServiceClient, ContainerClient
-
-from utils.logger import App_Logger
+from utils.client_pool import get_pooled_container_client, get_pooled_service_client
+from utils.logger import App_Logger, trace_spans
 from utils.read_params import read_params
 
 
+@trace_spans
 class Blob_Operation:
     """
     Description :   This class is used for performing blob operations required by the service
@@ -27,6 +28,8 @@ class Blob_Operation:
 
         self.connection_string = environ["AZURE_CONN_STR"]
 
+        self.pool_config = self.config["blob_client"]
+
     def get_container_client(self, container, log_file):
         """
         Method Name :   get_container_client
@@ -43,11 +46,11 @@ class Blob_Operation:
         self.log_writer.start_log("start", self.class_name, method_name, log_file)
 
         try:
-            container_client = ContainerClient.from_connection_string(
-                self.connection_string, container=self.container[container]
+            container_client = get_pooled_container_client(
+                self.connection_string, self.container[container], self.pool_config
             )
 
-            self.log_writer.log("Got container client from connection string", log_file)
+            self.log_writer.log("Got container client from client pool", log_file)
 
             self.log_writer.start_log("exit", self.class_name, method_name, log_file)
 
@@ -72,11 +75,9 @@ class Blob_Operation:
         self.log_writer.start_log("start", self.class_name, method_name, log_file)
 
         try:
-            client = BlobServiceClient.from_connection_string(self.connection_string)
+            client = get_pooled_service_client(self.connection_string, self.pool_config)
 
-            self.log_writer.log(
-                "Got BlobServiceClient from connection string", log_file
-            )
+            self.log_writer.log("Got BlobServiceClient from client pool", log_file)
 
             blob_client = client.get_blob_client(
                 container=self.container[container], blob=blob_fname
@@ -223,7 +224,7 @@ class Blob_Operation:
 
                 dest_f = folder + "/" + f
 
-                self.upload_file(local_f, dest_f, container, log_file)
+                self.upload_file(local_f, dest_f, container, log_file, delete=delete)
 
             if delete is True:
                 rmtree(folder)
@@ -237,3 +238,36 @@ class Blob_Operation:
 
         except Exception as e:
             self.log_writer.exception_log(e, self.class_name, method_name, log_file)
+
+    def read_json(self, fname, container, log_file):
+        """
+        Method Name :   read_json
+        Description :   This method reads the json file from container
+
+        Output      :   The parsed json file is returned, None if the file is not present in container
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.read_json.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, log_file)
+
+        try:
+            client = self.get_container_client(container, log_file).get_blob_client(
+                fname
+            )
+
+            obj = loads(client.download_blob().readall()) if client.exists() else None
+
+            self.log_writer.log(
+                f"Read {fname} json from {container} container", log_file
+            )
+
+            self.log_writer.start_log("exit", self.class_name, method_name, log_file)
+
+            return obj
+
+        except Exception as e:
+            self.log_writer.exception_log(e, self.class_name, method_name, log_file)
@@ -4,11 +4,12 @@ from mlflow import get_experiment_by_name, search_runs, set_tracking_uri
 from mlflow.tracking import MlflowClient
 
 from blob_operations import Blob_Operation
-from utils.logger import App_Logger
+from utils.logger import App_Logger, trace_spans
 from utils.main_utils import Main_Utils
 from utils.read_params import read_params
 
 
+@trace_spans
 class MLFlow_Operation:
     """
     Description :    This class shall be used for handling all the mlflow operations
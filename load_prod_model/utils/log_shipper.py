@@ -0,0 +1,212 @@
+from concurrent.futures import ThreadPoolExecutor
+from gzip import compress
+from logging import DEBUG, Formatter, Handler
+from os import environ
+from os.path import basename
+from sys import stderr
+from threading import Event, Lock, Thread
+
+from utils.client_pool import get_pooled_container_client
+from utils.read_params import read_params
+
+
+class Log_Shipper(Handler):
+    """
+    Description :   This class is used for shipping the log records to append blobs in the logs container while the
+                    service runs, the records are buffered per log file and appended in batches on a background thread
+
+    Version     :   1.2
+    Revisions   :   Moved to setup to cloud
+    """
+
+    def __init__(self):
+        super().__init__(level=DEBUG)
+
+        self.config = read_params()
+
+        self.ship_config = self.config["log_shipping"]
+
+        self.log_dir = self.config["dir"]["log"]
+
+        self.container = self.config["blob_container"]["logs"]
+
+        self.connection_string = environ["AZURE_CONN_STR"]
+
+        self.pool_config = self.config["blob_client"]
+
+        self.formatter = Formatter(
+            fmt="%(asctime)s %(levelname)s %(message)s", datefmt="%H:%M:%S"
+        )
+
+        self.raw_formatter = Formatter(fmt="%(message)s")
+
+        self.buffers = {}
+
+        self.unsent = {}
+
+        self.created = set()
+
+        self.buffer_lock = Lock()
+
+        self.ship_lock = Lock()
+
+        self.stopped = Event()
+
+        self.thread = Thread(target=self.run, daemon=True)
+
+        self.thread.start()
+
+    def emit(self, record):
+        formatter = (
+            self.raw_formatter
+            if getattr(record, "raw_format", False)
+            else self.formatter
+        )
+
+        line = formatter.format(record) + "\n"
+
+        with self.buffer_lock:
+            self.buffers.setdefault(basename(record.log_fpath), []).append(line)
+
+    def run(self):
+        """
+        Method Name :   run
+        Description :   This method ships the buffered log records every interval till the shipper is closed
+
+        Output      :   The buffered log records are appended to the log blobs every interval
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        while not self.stopped.wait(self.ship_config["interval"]):
+            self.ship()
+
+    def ship_file(self, log_f, lines):
+        """
+        Method Name :   ship_file
+        Description :   This method appends the log lines of a log file to its append blob, the blob is created on
+                        the first append of the run and the lines are gzip compressed when compression is set. The
+                        bytes left of an earlier batch that failed part way are appended first, and when an append
+                        fails only the bytes that were not appended are kept for the next batch
+
+        Output      :   The log lines are appended to the log blob
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        data = "".join(lines).encode()
+
+        blob_name = self.log_dir + "/" + log_f
+
+        if self.ship_config["compress"] is True:
+            data, blob_name = compress(data), blob_name + ".gz"
+
+        data = self.unsent.pop(log_f, b"") + data
+
+        block_bytes = self.ship_config["max_block_bytes"]
+
+        appended = 0
+
+        try:
+            client = get_pooled_container_client(
+                self.connection_string, self.container, self.pool_config
+            ).get_blob_client(blob_name)
+
+            if blob_name not in self.created:
+                client.create_append_blob()
+
+                self.created.add(blob_name)
+
+            for i in range(0, len(data), block_bytes):
+                client.append_block(data[i : i + block_bytes])
+
+                appended = min(i + block_bytes, len(data))
+
+        except Exception:
+            self.unsent[log_f] = data[appended:]
+
+            raise
+
+    def ship(self):
+        """
+        Method Name :   ship
+        Description :   This method ships the buffered log records of all the log files concurrently, the bytes of a
+                        log file that failed to ship are kept by ship_file and shipped with the next batch. The
+                        failures are printed to stderr as the logger cannot log its own failures
+
+        Output      :   The buffered log records are appended to the log blobs
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        with self.ship_lock:
+            with self.buffer_lock:
+                batches, self.buffers = self.buffers, {}
+
+            for log_f in self.unsent:
+                batches.setdefault(log_f, [])
+
+            if not batches:
+                return
+
+            with ThreadPoolExecutor(
+                max_workers=self.ship_config["max_workers"]
+            ) as executor:
+                futures = {
+                    log_f: executor.submit(self.ship_file, log_f, lines)
+                    for log_f, lines in batches.items()
+                }
+
+            for log_f, future in futures.items():
+                if future.exception() is not None:
+                    print(
+                        f"Failed to ship {log_f} to {self.container} container, Error : {str(future.exception())}",
+                        file=stderr,
+                    )
+
+    def has_pending(self):
+        with self.buffer_lock:
+            return bool(self.buffers or self.unsent)
+
+    def discard(self):
+        """
+        Method Name :   discard
+        Description :   This method stops the shipping and drops the buffered log records, it is used once the log
+                        folder is uploaded in place of the shipped logs
+
+        Output      :   The shipping is stopped and the buffered log records are dropped
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        if not self.stopped.is_set():
+            self.stopped.set()
+
+            self.thread.join()
+
+        with self.ship_lock, self.buffer_lock:
+            self.buffers, self.unsent = {}, {}
+
+    def flush(self):
+        if not self.stopped.is_set():
+            self.ship()
+
+    def close(self):
+        if not self.stopped.is_set():
+            self.stopped.set()
+
+            self.thread.join()
+
+            self.ship()
+
+            if self.has_pending():
+                print(
+                    f"Dropped the logs of {sorted(set(self.buffers) | set(self.unsent))} that failed to ship",
+                    file=stderr,
+                )
+
+        super().close()
@@ -1,16 +1,18 @@
-from io import StringIO
+from io import BytesIO, StringIO
+from json import loads
 from os import environ, listdir, remove
 from os.path import join
 from pickle import dump, loads
 from shutil import rmtree
 
-from azure.storage.blob import BlobServiceClient, ContainerClient
-from pandas import read_csv
+from pandas import read_csv, read_parquet
 
-from utils.logger import App_Logger
+from utils.client_pool import get_pooled_container_client, get_pooled_service_client
+from utils.logger import App_Logger, trace_spans
 from utils.read_params import read_params
 
 
+@trace_spans
 class Blob_Operation:
     """
     Description :   This class is used for performing blob operations required by the service
@@ -32,6 +34,10 @@ class Blob_Operation:
 
         self.connection_string = environ["AZURE_CONN_STR"]
 
+        self.pool_config = self.config["blob_client"]
+
+        self.frame_config = self.config["frame_store"]
+
         self.log_writer = App_Logger()
 
     def get_container_client(self, container, log_file):
@@ -50,12 +56,11 @@ class Blob_Operation:
         self.log_writer.start_log("start", self.class_name, method_name, log_file)
 
         try:
-            container_client = ContainerClient.from_connection_string(
-                conn_str=self.connection_string,
-                container_name=self.container[container],
+            container_client = get_pooled_container_client(
+                self.connection_string, self.container[container], self.pool_config
             )
 
-            self.log_writer.log("Got container client from connection string", log_file)
+            self.log_writer.log("Got container client from client pool", log_file)
 
             self.log_writer.start_log("exit", self.class_name, method_name, log_file)
 
@@ -80,11 +85,9 @@ class Blob_Operation:
         self.log_writer.start_log("start", self.class_name, method_name, log_file)
 
         try:
-            client = BlobServiceClient.from_connection_string(self.connection_string)
+            client = get_pooled_service_client(self.connection_string, self.pool_config)
 
-            self.log_writer.log(
-                "Got BlobServiceClient from connection string", log_file
-            )
+            self.log_writer.log("Got BlobServiceClient from client pool", log_file)
 
             blob_client = client.get_blob_client(
                 container=self.container[container], blob=blob_fname
@@ -468,7 +471,7 @@ class Blob_Operation:
 
                 dest_f = folder + "/" + f
 
-                self.upload_file(local_f, dest_f, container, log_file)
+                self.upload_file(local_f, dest_f, container, log_file, delete=delete)
 
             if delete is True:
                 rmtree(folder)
@@ -515,3 +518,109 @@ class Blob_Operation:
 
         except Exception as e:
             self.log_writer.exception_log(e, self.class_name, method_name, log_file)
+
+    def get_frame_fname(self, fname, log_file):
+        """
+        Method Name :   get_frame_fname
+        Description :   This method gets the blob name of the dataframe file based on the format set for the feature store
+
+        Output      :   The blob name with the extension of the feature store format is returned
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.get_frame_fname.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, log_file)
+
+        try:
+            frame_fname = fname
+
+            if self.frame_config["format"] == "parquet":
+                frame_fname = fname.replace(".csv", ".parquet")
+
+            self.log_writer.log(
+                f"Got {frame_fname} as file name for {self.frame_config['format']} format",
+                log_file,
+            )
+
+            self.log_writer.start_log("exit", self.class_name, method_name, log_file)
+
+            return frame_fname
+
+        except Exception as e:
+            self.log_writer.exception_log(e, self.class_name, method_name, log_file)
+
+    def read_frame(self, fname, container, log_file, columns=None):
+        """
+        Method Name :   read_frame
+        Description :   This method reads the dataframe file from container in the format set for the feature store,
+                        with columns as the list of columns to be read. Parquet files keep the column types
+
+        Output      :   The dataframe file is read from the container and returned as dataframe
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.read_frame.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, log_file)
+
+        try:
+            frame_fname = self.get_frame_fname(fname, log_file)
+
+            client = self.get_container_client(container, log_file)
+
+            content = BytesIO(client.download_blob(blob=frame_fname).readall())
+
+            if self.frame_config["format"] == "parquet":
+                df = read_parquet(content, columns=columns)
+
+            else:
+                df = read_csv(content, usecols=columns)
+
+            self.log_writer.log(
+                f"Read {frame_fname} file from {container} container", log_file
+            )
+
+            self.log_writer.start_log("exit", self.class_name, method_name, log_file)
+
+            return df
+
+        except Exception as e:
+            self.log_writer.exception_log(e, self.class_name, method_name, log_file)
+
+    def read_json(self, fname, container, log_file):
+        """
+        Method Name :   read_json
+        Description :   This method reads the json file from container
+
+        Output      :   The parsed json file is returned, None if the file is not present in container
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.read_json.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, log_file)
+
+        try:
+            client = self.get_container_client(container, log_file).get_blob_client(
+                fname
+            )
+
+            obj = loads(client.download_blob().readall()) if client.exists() else None
+
+            self.log_writer.log(
+                f"Read {fname} json from {container} container", log_file
+            )
+
+            self.log_writer.start_log("exit", self.class_name, method_name, log_file)
+
+            return obj
+
+        except Exception as e:
+            self.log_writer.exception_log(e, self.class_name, method_name, log_file)
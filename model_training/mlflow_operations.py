@@ -4,10 +4,11 @@ from mlflow import log_metric, log_param, set_experiment, set_tracking_uri
 from mlflow.sklearn import log_model
 
 from blob_operations import Blob_Operation
-from utils.logger import App_Logger
+from utils.logger import App_Logger, trace_spans
 from utils.read_params import read_params
 
 
+@trace_spans
 class MLFlow_Operation:
     """
     Description :    This class shall be used for handling all the mlflow operations
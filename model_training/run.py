@@ -3,7 +3,7 @@ from mlflow import end_run, start_run
 from blob_operations import Blob_Operation
 from mlflow_operations import MLFlow_Operation
 from tuner import Model_Finder
-from utils.logger import App_Logger
+from utils.logger import App_Logger, print_span_summary
 from utils.main_utils import Main_Utils
 from utils.read_params import read_params
 
@@ -86,7 +86,7 @@ class Run:
                         cluster_feat, cluster_label, "model_train", idx=i,
                     )
 
-            self.log_writer.log(
+            self.log_writer.summary(
                 "Completed model and training and logging of the models to mlflow",
                 "model_train",
             )
@@ -111,6 +111,10 @@ if __name__ == "__main__":
         raise e
 
     finally:
-        utils = Main_Utils()
+        try:
+            utils = Main_Utils()
+
+            utils.upload_logs()
 
-        utils.upload_logs()
+        finally:
+            print_span_summary()
@@ -19,6 +19,10 @@ class Main_Utils:
 
         self.log_dir = self.config["dir"]["log"]
 
+        self.files = self.config["files"]
+
+        self.cluster_manifest = None
+
         self.file_pattern = self.config["file_pattern"]
 
         self.blob = Blob_Operation()
@@ -41,7 +45,14 @@ class Main_Utils:
         self.log_writer.start_log("start", self.class_name, method_name, "upload")
 
         try:
-            self.blob.upload_folder(self.log_dir, "logs", "upload")
+            self.log_writer.flush()
+
+            shipping_failed = self.log_writer.shipping_failed()
+
+            if self.log_writer.ship_logs is False or shipping_failed is True:
+                self.blob.upload_folder(
+                    self.log_dir, "logs", "upload", delete=shipping_failed is False
+                )
 
             self.log_writer.log("Uploaded logs to logs container", "upload")
 
@@ -53,7 +64,8 @@ class Main_Utils:
     def get_cluster_fname(self, key, idx, log_file):
         """
         Method Name :   get_cluster_fname
-        Description :   This method gets the file name based on the cluster number
+        Description :   This method gets the file name based on the cluster number. The name is read from the cluster
+                        manifest, and it is built from the cluster number only when the manifest is not present
         
         Output      :   File name based on cluster number is returned
         On Failure  :   Write an exception log and then raise an exception
@@ -66,7 +78,15 @@ class Main_Utils:
         self.log_writer.start_log("start", self.class_name, method_name, log_file)
 
         try:
-            cluster_fname = "climate_" + key + f"-{idx}.csv"
+            manifest = self.get_cluster_manifest(log_file)
+
+            if manifest is not None:
+                cluster = next(c for c in manifest["clusters"] if c["cluster"] == idx)
+
+                cluster_fname = cluster[key]
+
+            else:
+                cluster_fname = "climate_" + key + f"-{idx}.csv"
 
             self.log_writer.log(f"Got the cluster file name for {key}", log_file)
 
@@ -93,7 +113,7 @@ class Main_Utils:
         self.log_writer.start_log("start", self.class_name, method_name, log_file)
 
         try:
-            df = self.blob.read_csv(fname, container, log_file)
+            df = self.blob.read_frame(fname, container, log_file, columns=["Labels"])
 
             self.log_writer.log(
                 "Got dataframe from {container} with file as {fname}", log_file
@@ -130,7 +150,7 @@ class Main_Utils:
         self.log_writer.start_log("start", self.class_name, method_name, log_file)
 
         try:
-            df = self.blob.read_csv(fname, container, log_file)
+            df = self.blob.read_frame(fname, container, log_file)
 
             self.log_writer.log(
                 f"Got the dataframe from {container} with file name as {fname}",
@@ -166,7 +186,9 @@ class Main_Utils:
         self.log_writer.start_log("start", self.class_name, method_name, log_file)
 
         try:
-            df = self.blob.read_csv(fname, container, log_file)["Labels"]
+            df = self.blob.read_frame(fname, container, log_file, columns=["Labels"])[
+                "Labels"
+            ]
 
             self.log_writer.log(
                 "Got dataframe from {container} with file as {fname}", log_file
@@ -197,7 +219,7 @@ class Main_Utils:
         self.log_writer.start_log("start", self.class_name, method_name, log_file)
 
         try:
-            df = self.blob.read_csv(fname, "feature_store", log_file)
+            df = self.blob.read_frame(fname, "feature_store", log_file)
 
             self.log_writer.log(
                 f"Got the dataframe from feature store with file name as {fname}",
@@ -281,10 +303,43 @@ class Main_Utils:
         except Exception as e:
             self.log_writer.exception_log(e, self.class_name, method_name, log_file)
 
+    def get_cluster_manifest(self, log_file):
+        """
+        Method Name :   get_cluster_manifest
+        Description :   This method gets the cluster manifest written by the clustering service to the feature store
+                        container, the manifest is read once and kept for the later calls
+
+        Output      :   The cluster manifest is returned, None if the manifest is not present
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.get_cluster_manifest.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, log_file)
+
+        try:
+            if self.cluster_manifest is None:
+                self.cluster_manifest = self.blob.read_json(
+                    self.files["cluster_manifest"], "feature_store", log_file
+                )
+
+            self.log_writer.log("Got the cluster manifest", log_file)
+
+            self.log_writer.start_log("exit", self.class_name, method_name, log_file)
+
+            return self.cluster_manifest
+
+        except Exception as e:
+            self.log_writer.exception_log(e, self.class_name, method_name, log_file)
+
     def get_number_of_clusters(self, log_file):
         """
         Method Name :   get_number_of_cluster
-        Description :   This method gets the number of clusters based on training data on which clustering algorithm was used
+        Description :   This method gets the number of clusters based on training data on which clustering algorithm was used.
+                        The number is read from the cluster manifest, and the feature files are listed only when the
+                        manifest is not present
         
         Output      :   The number of clusters for the given training data is returned
         On Failure  :   Write an exception log and then raise an exception
@@ -297,6 +352,22 @@ class Main_Utils:
         self.log_writer.start_log("start", self.class_name, method_name, log_file)
 
         try:
+            manifest = self.get_cluster_manifest(log_file)
+
+            if manifest is not None:
+                num_clusters = manifest["num_clusters"]
+
+                self.log_writer.log(
+                    f"Got the number of clusters as {num_clusters} from cluster manifest",
+                    log_file,
+                )
+
+                self.log_writer.start_log(
+                    "exit", self.class_name, method_name, log_file
+                )
+
+                return num_clusters
+
             feat_fnames = self.blob.get_files_from_folder(
                 self.file_pattern, "feature_store", log_file
             )
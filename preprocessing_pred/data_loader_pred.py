@@ -35,7 +35,7 @@ class Data_Getter_Pred:
         self.log_writer.start_log("start", self.class_name, method_name, self.log_file)
 
         try:
-            df = self.blob.read_csv("pred_input", "feature_store", self.log_file)
+            df = self.blob.read_frame("pred_input", "feature_store", self.log_file)
 
             self.log_writer.log(
                 "Data loaded from pred input file and feature store container",
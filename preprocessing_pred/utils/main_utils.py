@@ -39,7 +39,14 @@ class Main_Utils:
         self.log_writer.start_log("start", self.class_name, method_name, "upload")
 
         try:
-            self.blob.upload_folder(self.log_dir, "logs", "upload")
+            self.log_writer.flush()
+
+            shipping_failed = self.log_writer.shipping_failed()
+
+            if self.log_writer.ship_logs is False or shipping_failed is True:
+                self.blob.upload_folder(
+                    self.log_dir, "logs", "upload", delete=shipping_failed is False
+                )
 
             self.log_writer.log("Uploaded logs to logs container", "upload")
 
@@ -90,12 +97,8 @@ class Main_Utils:
         self.log_writer.start_log("start", self.class_name, method_name, log_file)
 
         try:
-            self.blob.upload_df_as_csv(
-                data,
-                "pred_input_preprocess",
-                "pred_input_preprocess",
-                "feature_store",
-                log_file,
+            self.blob.write_frame(
+                data, "pred_input_preprocess", "feature_store", log_file
             )
 
             self.log_writer.log(
@@ -35,7 +35,9 @@ class Data_Getter_Train:
         self.log_writer.start_log("start", self.class_name, method_name, self.log_file)
 
         try:
-            df = self.blob.read_csv("train_input", "feature_store", self.log_file)
+            df = self.blob.read_frame_parts(
+                "train_input", "feature_store", self.log_file
+            )
 
             self.log_writer.log("Data loaded from container", self.log_file)
 
@@ -1,6 +1,6 @@
 from data_loader_train import Data_Getter_Train
 from preprocessing import Preprocessor
-from utils.logger import App_Logger
+from utils.logger import App_Logger, print_span_summary
 from utils.main_utils import Main_Utils
 
 
@@ -58,7 +58,7 @@ class Run:
 
             self.utils.upload_preprocessed_data(data, "preprocess_train")
 
-            self.log_writer.log(
+            self.log_writer.summary(
                 "Completed preprocessing for training data", "preprocess_train"
             )
 
@@ -82,6 +82,10 @@ if __name__ == "__main__":
         raise e
 
     finally:
-        utils = Main_Utils()
+        try:
+            utils = Main_Utils()
+
+            utils.upload_logs()
 
-        utils.upload_logs()
+        finally:
+            print_span_summary()
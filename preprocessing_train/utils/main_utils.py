@@ -41,13 +41,21 @@ class Main_Utils:
         self.log_writer.start_log("start", self.class_name, method_name, "upload")
 
         try:
-            self.blob.upload_folder(self.log_dir, "logs", "upload")
+            self.log_writer.flush()
+
+            shipping_failed = self.log_writer.shipping_failed()
+
+            if self.log_writer.ship_logs is False or shipping_failed is True:
+                self.blob.upload_folder(
+                    self.log_dir, "logs", "upload", delete=shipping_failed is False
+                )
 
             self.log_writer.log(f"Uploaded logs to logs container", "upload")
 
             self.log_writer.start_log("exit", self.class_name, method_name, "upload")
 
-            rmtree(self.log_dir)
+            if shipping_failed is False:
+                rmtree(self.log_dir)
 
         except Exception as e:
             self.log_writer.exception_log(e, self.class_name, method_name, "upload")
@@ -58,12 +66,8 @@ class Main_Utils:
         self.log_writer.start_log("start", self.class_name, method_name, log_file)
 
         try:
-            self.blob.upload_df_as_csv(
-                data,
-                "pred_input_preprocess",
-                "pred_input_preprocess",
-                "feature_store",
-                log_file,
+            self.blob.write_frame(
+                data, "train_input_preprocess", "feature_store", log_file
             )
 
             self.log_writer.log("Uploaded preprocessed data to s3 container", log_file)
@@ -1,8 +1,9 @@
-from re import match, split
+from re import compile
 
 from blob_operations import Blob_Operation
 from utils.logger import App_Logger
 from utils.main_utils import Main_Utils
+from utils.read_params import read_params
 
 
 class Raw_Pred_Data_Validation:
@@ -23,6 +24,10 @@ class Raw_Pred_Data_Validation:
 
         self.blob = Blob_Operation()
 
+        self.config = read_params()
+
+        self.dir = self.config["dir"]
+
     def values_from_schema(self):
         """
         Method Name :   values_from_schema
@@ -105,6 +110,63 @@ class Raw_Pred_Data_Validation:
         except Exception as e:
             self.log_writer.exception_log(e, self.class_name, method_name, "general")
 
+    def classify_raw_fnames(
+        self, regex, LengthOfDateStampInFile, LengthOfTimeStampInFile, fnames
+    ):
+        """
+        Method Name :   classify_raw_fnames
+        Description :   This method classifies the raw file names based on regex pattern and schema values, the regex pattern
+                        is compiled once and the whole listing is classified in memory
+
+        Output      :   A list of good file names, a list of bad file names and a report with the reason for each bad file name
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.classify_raw_fnames.__name__
+
+        try:
+            pattern = compile(regex)
+
+            good_fnames, bad_fnames, reasons = [], [], {}
+
+            for fname in fnames:
+                splitAtDot = fname.split(".csv")[0].split("_")
+
+                if pattern.match(fname) is None:
+                    reasons[fname] = "file name does not match the regex pattern"
+
+                elif len(splitAtDot) < 3:
+                    reasons[fname] = "file name has no date stamp or time stamp"
+
+                elif len(splitAtDot[1]) != LengthOfDateStampInFile:
+                    reasons[fname] = "length of date stamp does not match the schema"
+
+                elif len(splitAtDot[2]) != LengthOfTimeStampInFile:
+                    reasons[fname] = "length of time stamp does not match the schema"
+
+                else:
+                    good_fnames.append(fname)
+
+                    continue
+
+                bad_fnames.append(fname)
+
+            report = {
+                "total": len(fnames),
+                "good": len(good_fnames),
+                "bad": len(bad_fnames),
+                "reasons": reasons,
+            }
+
+            return good_fnames, bad_fnames, report
+
+        except Exception as e:
+            self.log_writer.exception_log(
+                e, self.class_name, method_name, "name_validation"
+            )
+
     def validate_raw_fname(
         self, regex, LengthOfDateStampInFile, LengthOfTimeStampInFile
     ):
@@ -112,7 +174,8 @@ class Raw_Pred_Data_Validation:
         Method Name :   validate_raw_fname
         Description :   This method validates the raw file name based on regex pattern and schema values
 
-        Output      :   Raw file names are validated, good file names are stored in good data folder and rest is stored in bad data
+        Output      :   Raw file names are validated, good file names are stored in good data folder and rest is stored in bad data.
+                        The copies are dispatched as one concurrent batch
         On Failure  :   Write an exception log and then raise an exception
 
         Version     :   1.2
@@ -132,66 +195,33 @@ class Raw_Pred_Data_Validation:
             pred_batch_files = [f.split("/")[1] for f in onlyfiles]
 
             self.log_writer.log(
-                "Got preding files with absolute file name", "name_validation",
+                "Got preding files with absolute file name", "name_validation"
             )
 
-            for fname in pred_batch_files:
-                raw_data_pred_fname = self.utils.get_filename(
-                    "raw_pred_batch_data", fname, "name_validation"
-                )
+            good_fnames, bad_fnames, report = self.classify_raw_fnames(
+                regex,
+                LengthOfDateStampInFile,
+                LengthOfTimeStampInFile,
+                pred_batch_files,
+            )
 
-                good_data_pred_fname = self.utils.get_filename(
-                    "pred_good_data", fname, "name_validation"
-                )
+            self.log_writer.summary(
+                f"Name validation report : {report}", "name_validation"
+            )
 
-                bad_data_pred_fname = self.utils.get_filename(
-                    "pred_bad_data", fname, "name_validation"
-                )
+            raw_dir = self.dir["raw_pred_batch_data"]
 
-                self.log_writer.log(
-                    "Created raw,good and bad data file name", "name_validation",
-                )
+            good_dir = self.dir["pred_good_data"]
 
-                if match(regex, fname):
-                    splitAtDot = split(".csv", fname)
-
-                    splitAtDot = split("_", splitAtDot[0])
-
-                    if len(splitAtDot[1]) == LengthOfDateStampInFile:
-                        if len(splitAtDot[2]) == LengthOfTimeStampInFile:
-                            self.blob.copy_data(
-                                raw_data_pred_fname,
-                                "raw_pred_data",
-                                good_data_pred_fname,
-                                "pred_data",
-                                "name_validation",
-                            )
-
-                        else:
-                            self.blob.copy_data(
-                                raw_data_pred_fname,
-                                "raw_pred_data",
-                                bad_data_pred_fname,
-                                "pred_data",
-                                "name_validation",
-                            )
-
-                    else:
-                        self.blob.copy_data(
-                            raw_data_pred_fname,
-                            "raw_pred_data",
-                            bad_data_pred_fname,
-                            "pred_data",
-                            "name_validation",
-                        )
-                else:
-                    self.blob.copy_data(
-                        raw_data_pred_fname,
-                        "raw_pred_data",
-                        bad_data_pred_fname,
-                        "pred_data",
-                        "name_validation",
-                    )
+            bad_dir = self.dir["pred_bad_data"]
+
+            copy_lst = [
+                (raw_dir + "/" + f, good_dir + "/" + f) for f in good_fnames
+            ] + [(raw_dir + "/" + f, bad_dir + "/" + f) for f in bad_fnames]
+
+            self.blob.copy_files(
+                copy_lst, "raw_pred_data", "pred_data", "name_validation"
+            )
 
             self.log_writer.start_log(
                 "exit", self.class_name, method_name, "name_validation",
@@ -205,7 +235,8 @@ class Raw_Pred_Data_Validation:
     def validate_col_length(self, NumberofColumns):
         """
         Method Name :   validate_col_length
-        Description :   This method validates the column length based on number of columns as mentioned in schema values
+        Description :   This method validates the column length based on number of columns as mentioned in schema values,
+                        only the header of each file is downloaded to count the columns
 
         Output      :   The files' columns length are validated and good data is stored in good data folder and rest is stored in bad data folder
         On Failure  :   Write an exception log and then raise an exception
@@ -220,18 +251,20 @@ class Raw_Pred_Data_Validation:
         )
 
         try:
-            lst = self.blob.read_csv_from_folder(
+            lst = self.blob.get_csv_col_counts(
                 "pred_good_data", "pred_data", "col_validation"
             )
 
+            bad_lst = []
+
             for _, f in enumerate(lst):
-                df = f[0]
+                col_count = f[0]
 
                 file = f[1]
 
                 abs_f = f[2]
 
-                if df.shape[1] == NumberofColumns:
+                if col_count == NumberofColumns:
                     pass
 
                 else:
@@ -239,9 +272,9 @@ class Raw_Pred_Data_Validation:
                         "pred_bad_data", abs_f, "col_validation"
                     )
 
-                    self.blob.move_data(
-                        file, "pred_data", dest_f, "pred_data", "col_validation"
-                    )
+                    bad_lst.append((file, dest_f))
+
+            self.blob.move_files(bad_lst, "pred_data", "pred_data", "col_validation")
 
             self.log_writer.start_log(
                 "exit", self.class_name, method_name, "col_validation"
@@ -270,10 +303,12 @@ class Raw_Pred_Data_Validation:
         )
 
         try:
-            lst = self.blob.read_csv_from_folder(
+            lst = self.blob.iter_csv_from_folder(
                 "pred_good_data", "pred_data", "missing_values_in_col"
             )
 
+            bad_lst = []
+
             for _, f in enumerate(lst):
                 df = f[0]
 
@@ -291,13 +326,7 @@ class Raw_Pred_Data_Validation:
                             "pred_bad_batch", abs_f, "missing_values_in_col"
                         )
 
-                        self.blob.move_data(
-                            file,
-                            "pred_data",
-                            dest_f,
-                            "pred_data",
-                            "missing_values_in_col",
-                        )
+                        bad_lst.append((file, dest_f))
 
                         break
 
@@ -313,11 +342,85 @@ class Raw_Pred_Data_Validation:
                 else:
                     pass
 
-                self.log_writer.start_log(
-                    "exit", self.class_name, method_name, "missing_values_in_col",
-                )
+            self.blob.move_files(
+                bad_lst, "pred_data", "pred_data", "missing_values_in_col"
+            )
+
+            self.log_writer.start_log(
+                "exit", self.class_name, method_name, "missing_values_in_col"
+            )
 
         except Exception as e:
             self.log_writer.exception_log(
                 e, self.class_name, method_name, "missing_values_in_col",
             )
+
+    def validate_good_data(self, NumberofColumns):
+        """
+        Method Name :   validate_good_data
+        Description :   This method validates the column length and the missing values in columns. The column length is
+                        checked from the header of each file, and only the files with correct column length are downloaded
+                        once for the missing values check. A file is moved to the bad data folder only if one of the checks
+                        fails, files which pass both the checks are left untouched in the good data folder
+
+        Output      :   The files in good data folder are validated, and the failed files are moved to bad data folder
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.validate_good_data.__name__
+
+        self.log_writer.start_log(
+            "start", self.class_name, method_name, "good_data_validation"
+        )
+
+        try:
+            self.validate_col_length(NumberofColumns)
+
+            lst = self.blob.iter_csv_from_folder(
+                "pred_good_data", "pred_data", "good_data_validation"
+            )
+
+            good_count, bad_lst = 0, []
+
+            for df, file, abs_f in lst:
+                if df.shape[1] != NumberofColumns:
+                    reason = f"has {df.shape[1]} columns instead of {NumberofColumns}"
+
+                elif df.isna().all().any():
+                    reason = "has a column with all values missing"
+
+                else:
+                    good_count += 1
+
+                    continue
+
+                dest_f = self.utils.get_filename(
+                    "pred_bad_data", abs_f, "good_data_validation"
+                )
+
+                bad_lst.append((file, dest_f))
+
+                self.log_writer.log(
+                    f"{abs_f} file {reason}, moving it to bad data folder",
+                    "good_data_validation",
+                )
+
+            outcomes = self.blob.move_files(
+                bad_lst, "pred_data", "pred_data", "good_data_validation"
+            )
+
+            self.log_writer.log(
+                f"Validated good data, {good_count} files passed and {len(bad_lst)} files failed, move outcomes are {outcomes}",
+                "good_data_validation",
+            )
+
+            self.log_writer.start_log(
+                "exit", self.class_name, method_name, "good_data_validation"
+            )
+
+        except Exception as e:
+            self.log_writer.exception_log(
+                e, self.class_name, method_name, "good_data_validation"
+            )
@@ -1,3 +1,5 @@
+from os import listdir
+from os.path import join
 from shutil import rmtree
 
 from blob_operations import Blob_Operation
@@ -26,13 +28,36 @@ class Main_Utils:
         self.log_writer.start_log("start", self.class_name, method_name, "upload")
 
         try:
-            self.blob.upload_folder(self.log_dir, "upload")
+            self.log_writer.flush()
+
+            shipping_failed = self.log_writer.shipping_failed()
+
+            if self.log_writer.ship_logs is False or shipping_failed is True:
+                lst = listdir(self.log_dir)
+
+                self.log_writer.log(
+                    f"Got list of logs from {self.log_dir} folder", "upload"
+                )
+
+                for f in lst:
+                    local_f = join(self.log_dir, f)
+
+                    dest_f = self.log_dir + "/" + f
+
+                    self.blob.upload_file(
+                        local_f,
+                        dest_f,
+                        "logs",
+                        "upload",
+                        delete=shipping_failed is False,
+                    )
 
             self.log_writer.log("Uploaded logs to logs container", "upload")
 
             self.log_writer.start_log("exit", self.class_name, method_name, "upload")
 
-            rmtree(self.log_dir)
+            if shipping_failed is False:
+                rmtree(self.log_dir)
 
         except Exception as e:
             self.log_writer.exception_log(e, self.class_name, method_name, "upload")
@@ -1,14 +1,20 @@
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from csv import reader
 from io import StringIO
 from json import loads
+from logging import ERROR
 from os import environ, remove
+from time import sleep, time
 
-from azure.storage.blob import BlobServiceClient, ContainerClient
 from pandas import read_csv
 
-from utils.logger import App_Logger
+from utils.client_pool import get_pooled_container_client, get_pooled_service_client
+from utils.logger import App_Logger, trace_spans
 from utils.read_params import read_params
 
 
+@trace_spans
 class Blob_Operation:
     def __init__(self):
         self.class_name = self.__class__.__name__
@@ -23,6 +29,20 @@ class Blob_Operation:
 
         self.connection_string = environ["AZURE_CONN_STR"]
 
+        self.pool_config = self.config["blob_client"]
+
+        self.upload_config = self.config["blob_upload"]
+
+        self.download_workers = self.config["blob_download"]["max_workers"]
+
+        self.prefetch = self.config["blob_download"]["prefetch"]
+
+        self.header_bytes = self.config["blob_download"]["header_bytes"]
+
+        self.copy_config = self.config["blob_copy"]
+
+        self.copy_workers = self.copy_config["max_workers"]
+
         self.log_writer = App_Logger()
 
     def get_container_client(self, container, log_file):
@@ -31,12 +51,11 @@ class Blob_Operation:
         self.log_writer.start_log("start", self.class_name, method_name, log_file)
 
         try:
-            container_client = ContainerClient.from_connection_string(
-                conn_str=self.connection_string,
-                container_name=self.container[container],
+            container_client = get_pooled_container_client(
+                self.connection_string, self.container[container], self.pool_config
             )
 
-            self.log_writer.log("Got container client from connection string", log_file)
+            self.log_writer.log("Got container client from client pool", log_file)
 
             self.log_writer.start_log("exit", self.class_name, method_name, log_file)
 
@@ -51,11 +70,9 @@ class Blob_Operation:
         self.log_writer.start_log("start", self.class_name, method_name, log_file)
 
         try:
-            client = BlobServiceClient.from_connection_string(self.connection_string)
+            client = get_pooled_service_client(self.connection_string, self.pool_config)
 
-            self.log_writer.log(
-                "Got BlobServiceClient from connection string", log_file
-            )
+            self.log_writer.log("Got BlobServiceClient from client pool", log_file)
 
             blob_client = client.get_blob_client(
                 self.container[container], self.files[blob_fname]
@@ -335,6 +352,160 @@ class Blob_Operation:
         except Exception as e:
             self.log_writer.exception_log(e, self.class_name, method_name, log_file)
 
+    def start_copy(self, f, src_client, dest_client, log_file):
+        method_name = self.start_copy.__name__
+
+        try:
+            to_blob = dest_client.get_blob_client(blob=f[1])
+
+            props = to_blob.start_copy_from_url(
+                src_client.get_blob_client(blob=f[0]).url
+            )
+
+            return props["copy_status"]
+
+        except Exception as e:
+            self.log_writer.log(
+                f"Exception occured in Class : {self.class_name}, Method : {method_name}, Error : {str(e)}",
+                log_file,
+                level=ERROR,
+            )
+
+            return "failed"
+
+    def wait_for_copies(self, lst, status, container, log_file):
+        method_name = self.wait_for_copies.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, log_file)
+
+        try:
+            client = self.get_container_client(container, log_file)
+
+            get_copy_status = (
+                lambda f: client.get_blob_client(blob=f[1])
+                .get_blob_properties()
+                .copy.status
+            )
+
+            interval = self.copy_config["poll_interval"]
+
+            deadline = time() + self.copy_config["timeout"]
+
+            pending = [f for f in lst if status[f[0]] == "pending"]
+
+            while pending and time() < deadline:
+                sleep(interval)
+
+                with ThreadPoolExecutor(max_workers=self.copy_workers) as executor:
+                    status.update(
+                        zip(
+                            [f[0] for f in pending],
+                            executor.map(get_copy_status, pending),
+                        )
+                    )
+
+                pending = [f for f in pending if status[f[0]] == "pending"]
+
+                interval = min(interval * 2, self.copy_config["max_poll_interval"])
+
+            self.log_writer.log(
+                f"Waited for copies to {container} container, {len(pending)} copies are still pending",
+                log_file,
+            )
+
+            self.log_writer.start_log("exit", self.class_name, method_name, log_file)
+
+            return status
+
+        except Exception as e:
+            self.log_writer.exception_log(e, self.class_name, method_name, log_file)
+
+    def copy_files(self, lst, from_container, to_container, log_file, wait=True):
+        method_name = self.copy_files.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, log_file)
+
+        try:
+            src_client = self.get_container_client(from_container, log_file)
+
+            dest_client = self.get_container_client(to_container, log_file)
+
+            start_copy = lambda f: self.start_copy(f, src_client, dest_client, log_file)
+
+            with ThreadPoolExecutor(max_workers=self.copy_workers) as executor:
+                status = dict(zip([f[0] for f in lst], executor.map(start_copy, lst)))
+
+            if wait is True:
+                status = self.wait_for_copies(lst, status, to_container, log_file)
+
+            self.log_writer.summary(
+                f"Copied {len(lst)} files from {from_container} container to {to_container} container, outcomes are {dict(Counter(status.values()))}",
+                log_file,
+            )
+
+            ok_status = ("success",) if wait is True else ("success", "pending")
+
+            failed = [
+                f for f, copy_status in status.items() if copy_status not in ok_status
+            ]
+
+            if failed:
+                raise Exception(
+                    f"Copy of {len(failed)} files from {from_container} container to {to_container} container did not succeed, files are {failed}"
+                )
+
+            self.log_writer.start_log("exit", self.class_name, method_name, log_file)
+
+            return status
+
+        except Exception as e:
+            self.log_writer.exception_log(e, self.class_name, method_name, log_file)
+
+    def move_files(self, lst, from_container, to_container, log_file):
+        method_name = self.move_files.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, log_file)
+
+        try:
+            status = self.copy_files(lst, from_container, to_container, log_file)
+
+            outcomes = {f[0]: "copy " + status[f[0]] for f in lst}
+
+            copied = [f[0] for f in lst if status[f[0]] == "success"]
+
+            client = self.get_container_client(from_container, log_file)
+
+            batch_size = self.copy_config["delete_batch_size"]
+
+            for i in range(0, len(copied), batch_size):
+                batch = copied[i : i + batch_size]
+
+                responses = client.delete_blobs(*batch, raise_on_any_failure=False)
+
+                for f, response in zip(batch, responses):
+                    outcomes[f] = (
+                        "moved" if response.status_code == 202 else "delete failed"
+                    )
+
+            self.log_writer.summary(
+                f"Moved {len(lst)} files from {from_container} container to {to_container} container, outcomes are {dict(Counter(outcomes.values()))}",
+                log_file,
+            )
+
+            failed = [f for f, outcome in outcomes.items() if outcome != "moved"]
+
+            if failed:
+                raise Exception(
+                    f"Delete of {len(failed)} copied files from {from_container} container failed, files are {failed}"
+                )
+
+            self.log_writer.start_log("exit", self.class_name, method_name, log_file)
+
+            return outcomes
+
+        except Exception as e:
+            self.log_writer.exception_log(e, self.class_name, method_name, log_file)
+
     def get_df_from_object(self, object, log_file):
         method_name = self.get_df_from_object.__name__
 
@@ -383,14 +554,17 @@ class Blob_Operation:
         try:
             files = self.get_files_from_folder(folder_name, container, log_file)
 
-            lst = [
-                (
-                    self.read_csv(f, container, log_file, folder=True),
-                    f,
-                    f.split("/")[-1],
+            with ThreadPoolExecutor(max_workers=self.download_workers) as executor:
+                dfs = executor.map(
+                    lambda f: self.read_csv(f, container, log_file, folder=True), files
                 )
-                for f in files
-            ]
+
+                lst = [(df, f, f.split("/")[-1]) for df, f in zip(dfs, files)]
+
+            self.log_writer.log(
+                f"Downloaded {len(lst)} csv files with {self.download_workers} workers",
+                log_file,
+            )
 
             self.log_writer.log(
                 f"Read csv files from {folder_name} folder from {container} container",
@@ -404,18 +578,124 @@ class Blob_Operation:
         except Exception as e:
             self.log_writer.exception_log(e, self.class_name, method_name, log_file)
 
+    def iter_csv_from_folder(self, folder_name, container, log_file):
+        method_name = self.iter_csv_from_folder.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, log_file)
+
+        try:
+            files = self.get_files_from_folder(folder_name, container, log_file)
+
+            with ThreadPoolExecutor(max_workers=self.download_workers) as executor:
+                pending = deque()
+
+                for f in files:
+                    pending.append(
+                        (
+                            executor.submit(
+                                self.read_csv, f, container, log_file, folder=True
+                            ),
+                            f,
+                        )
+                    )
+
+                    if len(pending) > self.prefetch:
+                        future, fname = pending.popleft()
+
+                        yield future.result(), fname, fname.split("/")[-1]
+
+                while pending:
+                    future, fname = pending.popleft()
+
+                    yield future.result(), fname, fname.split("/")[-1]
+
+            self.log_writer.log(
+                f"Streamed csv files from {folder_name} folder from {container} container",
+                log_file,
+            )
+
+            self.log_writer.start_log("exit", self.class_name, method_name, log_file)
+
+        except Exception as e:
+            self.log_writer.exception_log(e, self.class_name, method_name, log_file)
+
+    def get_csv_col_count(self, fname, container, log_file):
+        method_name = self.get_csv_col_count.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, log_file)
+
+        try:
+            client = self.get_container_client(container, log_file)
+
+            head = client.download_blob(blob=fname, offset=0, length=self.header_bytes)
+
+            content = head.readall().decode(errors="ignore")
+
+            if "\n" in content or head.properties.size <= self.header_bytes:
+                header = content.splitlines()[0] if content else ""
+
+                col_count = len(next(reader([header])))
+
+                self.log_writer.log(
+                    f"Got {col_count} columns from header of {fname} file", log_file
+                )
+
+            else:
+                df = self.read_csv(fname, container, log_file, folder=True)
+
+                col_count = df.shape[1]
+
+                self.log_writer.log(
+                    f"Header of {fname} file is longer than {self.header_bytes} bytes, got {col_count} columns from full read",
+                    log_file,
+                )
+
+            self.log_writer.start_log("exit", self.class_name, method_name, log_file)
+
+            return col_count
+
+        except Exception as e:
+            self.log_writer.exception_log(e, self.class_name, method_name, log_file)
+
+    def get_csv_col_counts(self, folder_name, container, log_file):
+        method_name = self.get_csv_col_counts.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, log_file)
+
+        try:
+            files = self.get_files_from_folder(folder_name, container, log_file)
+
+            with ThreadPoolExecutor(max_workers=self.download_workers) as executor:
+                counts = executor.map(
+                    lambda f: self.get_csv_col_count(f, container, log_file), files
+                )
+
+                lst = [(c, f, f.split("/")[-1]) for c, f in zip(counts, files)]
+
+            self.log_writer.log(
+                f"Got column counts of csv files from {folder_name} folder from {container} container",
+                log_file,
+            )
+
+            self.log_writer.start_log("exit", self.class_name, method_name, log_file)
+
+            return lst
+
+        except Exception as e:
+            self.log_writer.exception_log(e, self.class_name, method_name, log_file)
+
     def move_data(self, from_fname, from_container, to_fname, to_container, log_file):
         method_name = self.move_data.__name__
 
         self.log_writer.start_log("start", self.class_name, method_name, log_file)
 
         try:
-            self.copy_data(from_fname, from_container, to_fname, to_container, log_file)
-
-            self.delete_file(from_fname, from_container, log_file)
+            outcomes = self.move_files(
+                [(from_fname, to_fname)], from_container, to_container, log_file
+            )
 
             self.log_writer.log(
-                f"Moved {from_fname} file from {from_container} container to {to_container} container,with {to_fname} file as name",
+                f"Moved {from_fname} file from {from_container} container to {to_container} container,with {to_fname} file as name, outcome is {outcomes[from_fname]}",
                 log_file,
             )
 
@@ -432,14 +712,28 @@ class Blob_Operation:
         self.log_writer.start_log("start", self.class_name, method_name, log_file)
 
         try:
-            dataframe.to_csv(self.files[local_fname], index=None, header=True)
+            client = self.get_container_client(container, log_file)
+
+            chunk_rows = self.upload_config["chunk_rows"]
+
+            if len(dataframe) > chunk_rows:
+                data = (
+                    dataframe.iloc[i : i + chunk_rows]
+                    .to_csv(index=None, header=i == 0)
+                    .encode()
+                    for i in range(0, len(dataframe), chunk_rows)
+                )
+
+            else:
+                data = dataframe.to_csv(index=None, header=True).encode()
+
+            client.upload_blob(name=container_fname, data=data, overwrite=True)
 
             self.log_writer.log(
-                f"Created a local copy of dataframe with name {local_fname}", log_file
+                f"Uploaded dataframe to {container} container with name as {container_fname} file",
+                log_file,
             )
 
-            self.upload_file(local_fname, container_fname, container, log_file)
-
             self.log_writer.start_log("exit", self.class_name, method_name, log_file)
 
         except Exception as e:
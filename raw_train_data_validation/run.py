@@ -1,5 +1,5 @@
 from train_data_validation import Raw_Train_Data_Validation
-from utils.logger import App_Logger
+from utils.logger import App_Logger, print_span_summary
 from utils.main_utils import Main_Utils
 
 
@@ -41,11 +41,11 @@ class Run:
                 regex, LengthOfDateStampInFile, LengthOfTimeStampInFile
             )
 
-            self.raw_data.validate_col_length(noofcolumns)
+            self.raw_data.validate_good_data(noofcolumns)
 
-            self.raw_data.validate_missing_values_in_col()
-
-            self.log_writer.log("Raw Data Validation Completed !!", "raw_train_main")
+            self.log_writer.summary(
+                "Raw Data Validation Completed !!", "raw_train_main"
+            )
 
             self.log_writer.start_log(
                 "exit", self.class_name, method_name, "raw_train_main"
@@ -67,6 +67,10 @@ if __name__ == "__main__":
         raise e
 
     finally:
-        utils = Main_Utils()
+        try:
+            utils = Main_Utils()
+
+            utils.upload_logs()
 
-        utils.upload_logs()
+        finally:
+            print_span_summary()
@@ -1,10 +1,75 @@
+from copy import deepcopy
+from os import environ, stat
+from os.path import abspath
+from threading import Lock
+
 from yaml import safe_load
 
+ENV_PREFIX = "PARAMS__"
+
+_params_lock = Lock()
+
+_params_cache = {}
+
+
+def get_env_overrides():
+    """
+    Method Name :   get_env_overrides
+    Description :   This method gets the parameter overrides from environment variables. A variable like
+                    PARAMS__blob_download__max_workers=16 overrides blob_download -> max_workers, and the value is
+                    parsed as yaml so numbers, booleans and lists keep their types
+
+    Output      :   A sorted tuple of key path and value pairs is returned
+    On Failure  :   Write an exception log and then raise an exception
+
+    Version     :   1.2
+    Revisions   :   moved setup to cloud
+    """
+    return tuple(
+        sorted(
+            (tuple(k[len(ENV_PREFIX) :].split("__")), v)
+            for k, v in environ.items()
+            if k.startswith(ENV_PREFIX)
+        )
+    )
+
+
+def apply_env_overrides(config, overrides):
+    """
+    Method Name :   apply_env_overrides
+    Description :   This method applies the environment variable overrides to the parsed parameters, the key path is
+                    matched with the existing keys without considering the case
+
+    Output      :   The parameters with the overrides applied are returned
+    On Failure  :   Write an exception log and then raise an exception
+
+    Version     :   1.2
+    Revisions   :   moved setup to cloud
+    """
+    for path, value in overrides:
+        node = config
+
+        for i, key in enumerate(path):
+            key = next((k for k in node if str(k).lower() == key.lower()), key.lower())
+
+            if i == len(path) - 1:
+                node[key] = safe_load(value)
+
+            else:
+                if not isinstance(node.get(key), dict):
+                    node[key] = {}
+
+                node = node[key]
+
+    return config
+
 
 def read_params(config_path="params.yaml"):
     """
     Method Name :   read_params
-    Description :   This method reads the parameters from params.yaml file
+    Description :   This method reads the parameters from params.yaml file. The parsed parameters are cached for the
+                    process and are read again only when the modified time of the file or the environment overrides change.
+                    Every caller gets its own copy of the cached parameters as plain dicts and lists
 
     Output      :   Parameters are read from the params.yaml file
     On Failure  :   Write an exception log and then raise an exception
@@ -15,10 +80,20 @@ def read_params(config_path="params.yaml"):
     method_name = read_params.__name__
 
     try:
-        with open(config_path) as f:
-            config = safe_load(f)
+        path = abspath(config_path)
+
+        key = (stat(path).st_mtime_ns, get_env_overrides())
+
+        with _params_lock:
+            cached = _params_cache.get(path)
+
+            if cached is None or cached[0] != key:
+                with open(path) as f:
+                    config = apply_env_overrides(safe_load(f), key[1])
+
+                cached = _params_cache[path] = (key, config)
 
-        return config
+            return deepcopy(cached[1])
 
     except Exception as e:
         raise Exception(